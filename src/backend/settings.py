@@ -32,24 +32,56 @@ ALLOWED_HOSTS = []
 
 # Application definition
 
+# Set DJANGO_API_ONLY=1 to run a slim, API-only worker. The admin, the
+# interactive API docs and the apps only they need are not loaded, so new
+# workers finish app setup and start taking traffic sooner.
+API_ONLY = os.environ.get('DJANGO_API_ONLY') == '1'
+
 INSTALLED_APPS = [
-    'django.contrib.admin',
     'django.contrib.auth',
     'django.contrib.contenttypes',
-    'django.contrib.sessions',
-    'django.contrib.messages',
-    'django.contrib.staticfiles',
     'rest_framework',
+    'rest_framework.authtoken',
     'bookings',
-    'drf_spectacular',
 ]
 
+if not API_ONLY:
+    INSTALLED_APPS = ['django.contrib.admin'] + INSTALLED_APPS + [
+        'django.contrib.sessions',
+        'django.contrib.messages',
+        'django.contrib.staticfiles',
+        'drf_spectacular',
+    ]
+
 # Django REST Framework settings
 REST_FRAMEWORK = {
     # Use drf-spectacular to generate our API schema
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
+    # Clients authenticate with "Authorization: Token <key>"
+    'DEFAULT_AUTHENTICATION_CLASSES': [
+        'bookings.authentication.CachedTokenAuthentication',
+    ],
+    # Anyone can look at rooms and bookings, only authenticated users can change them
+    'DEFAULT_PERMISSION_CLASSES': [
+        'rest_framework.permissions.IsAuthenticatedOrReadOnly',
+    ],
 }
 
+if not API_ONLY:
+    # Lets admin users try out the browsable API after logging in to the admin
+    REST_FRAMEWORK['DEFAULT_AUTHENTICATION_CLASSES'].append('rest_framework.authentication.SessionAuthentication')
+
+# How long (in seconds) a resolved token principal (user id and team
+# memberships) is cached in process before it is loaded again.
+AUTH_PRINCIPAL_CACHE_TTL = int(os.environ.get('AUTH_PRINCIPAL_CACHE_TTL', 60))
+
+if API_ONLY:
+    # No docs and no browsable API in slim mode, only plain JSON. Falling back
+    # to DRF's own schema class keeps `@extend_schema` from importing all of
+    # drf-spectacular's schema generator.
+    del REST_FRAMEWORK['DEFAULT_SCHEMA_CLASS']
+    REST_FRAMEWORK['DEFAULT_RENDERER_CLASSES'] = ['rest_framework.renderers.JSONRenderer']
+
 # drf-spectacular settings
 SPECTACULAR_SETTINGS = {
     'TITLE': 'FreJun Booking API',
@@ -58,6 +90,12 @@ SPECTACULAR_SETTINGS = {
     'SERVE_INCLUDE_SCHEMA': False,
 }
 
+# Path to a pre-generated OpenAPI schema (built once with
+# `manage.py spectacular --format openapi-json --file <path>`).
+# When set and the file exists, /api/schema/ serves it as a static, cacheable
+# file instead of building the schema on every request.
+API_SCHEMA_FILE = os.environ.get('API_SCHEMA_FILE')
+
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -68,6 +106,12 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+if API_ONLY:
+    # The API authenticates with tokens, so slim workers skip sessions entirely.
+    MIDDLEWARE.remove('django.contrib.sessions.middleware.SessionMiddleware')
+    MIDDLEWARE.remove('django.contrib.auth.middleware.AuthenticationMiddleware')
+    MIDDLEWARE.remove('django.contrib.messages.middleware.MessageMiddleware')
+
 ROOT_URLCONF = 'backend.urls'
 
 TEMPLATES = [
@@ -103,6 +147,31 @@ DATABASES = {
     }
 }
 
+# Multi-site sharding
+# Each site's rooms and bookings can live in a database of their own.
+# SITE_SHARDS maps site slugs to database aliases, e.g. "north:shard_north,south:shard_south".
+# Each alias gets a database like the default one, named "<POSTGRES_NAME>_<alias>".
+# Sites without a shard use the default database.
+SITE_DATABASES = {}
+
+for entry in filter(None, os.environ.get('SITE_SHARDS', '').split(',')):
+    site_slug, alias = entry.strip().split(':')
+    SITE_DATABASES[site_slug] = alias
+    DATABASES.setdefault(alias, {**DATABASES['default'], 'NAME': f"{DATABASES['default']['NAME']}_{alias}"})
+
+DATABASE_ROUTERS = ['bookings.routers.SiteRouter']
+
+# The site used by the endpoints that are not scoped to a site
+DEFAULT_SITE = 'main'
+
+# How long (in seconds) each worker caches a site looked up by slug.
+# Saving or deleting a site clears the cache of the worker that made the change.
+SITE_CACHE_TTL = int(os.environ.get('SITE_CACHE_TTL', 300))
+
+# How long (in seconds) a tentative hold keeps a room for its owner to confirm.
+# Expired holds are ignored right away and deleted by `manage.py reap_holds`.
+BOOKING_HOLD_TTL = int(os.environ.get('BOOKING_HOLD_TTL', 120))
+
 
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
@@ -14,16 +14,48 @@ Including another URLconf
     1. Import the include() function: from django.urls import include, path
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
-from django.contrib import admin
+from pathlib import Path
+
+from django.conf import settings
 from django.urls import path, include
-from drf_spectacular.views import SpectacularAPIView, SpectacularSwaggerView
+from django.views.decorators.cache import cache_control
+from django.views.static import serve
+from rest_framework.authtoken.views import obtain_auth_token
 
 urlpatterns = [
-    path('admin/', admin.site.urls),
     path('api/v1/', include('bookings.urls')),
+    # Exchanges a username and password for an API token
+    path('api/v1/auth/token/', obtain_auth_token, name='obtain-token'),
+    # The same endpoints, scoped to one site (e.g. /api/v1/sites/north/bookings/)
+    path('api/v1/sites/<slug:site_slug>/', include('bookings.urls')),
+]
+
+if settings.API_SCHEMA_FILE and Path(settings.API_SCHEMA_FILE).is_file():
+    # Serves the schema generated at build time as a static, cacheable file
+    schema_file = Path(settings.API_SCHEMA_FILE)
+    urlpatterns += [
+        path(
+            'api/schema/',
+            cache_control(public=True, max_age=3600)(serve),
+            {'path': schema_file.name, 'document_root': schema_file.parent},
+            name='schema',
+        ),
+    ]
+elif not settings.API_ONLY:
+    from drf_spectacular.views import SpectacularAPIView
 
     # Serves the auto-generated API schema file
-    path('api/schema/', SpectacularAPIView.as_view(), name='schema'),
-    # Serves the interactive Swagger UI documentation page
-    path('api/docs/', SpectacularSwaggerView.as_view(url_name='schema'), name='swagger-ui'),
-]
+    urlpatterns += [
+        path('api/schema/', SpectacularAPIView.as_view(), name='schema'),
+    ]
+
+if not settings.API_ONLY:
+    # The admin and the docs are only loaded outside of slim, API-only mode
+    from django.contrib import admin
+    from drf_spectacular.views import SpectacularSwaggerView
+
+    urlpatterns += [
+        path('admin/', admin.site.urls),
+        # Serves the interactive Swagger UI documentation page
+        path('api/docs/', SpectacularSwaggerView.as_view(url_name='schema'), name='swagger-ui'),
+    ]
@@ -0,0 +1,112 @@
+import threading
+import time
+from typing import FrozenSet, NamedTuple
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication
+
+class Principal(NamedTuple):
+    """
+    The parts of an authenticated user the API needs on every request.
+    """
+    user_id: int
+    username: str
+    team_ids: FrozenSet[int]
+
+class PrincipalCache:
+    """
+    A small thread-safe, in-process cache of principals keyed by token,
+    with a TTL. Entries are also invalidated when a user or their team
+    memberships change (see `bookings.signals`).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # token key -> (expires_at, principal)
+        self._entries = {}
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, principal = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+            return principal
+
+    def set(self, key, principal):
+        expires_at = time.monotonic() + settings.AUTH_PRINCIPAL_CACHE_TTL
+        with self._lock:
+            self._entries[key] = (expires_at, principal)
+
+    def invalidate_key(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def invalidate_users(self, user_ids):
+        user_ids = set(user_ids)
+        with self._lock:
+            for key in [key for key, (_, principal) in self._entries.items() if principal.user_id in user_ids]:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+principal_cache = PrincipalCache()
+
+def get_team_ids(user):
+    """
+    Returns the ids of the teams an authenticated user is a member of.
+    Users authenticated with a token carry them from the cached principal,
+    so this only runs a query for other kinds of authentication.
+    """
+    team_ids = getattr(user, 'team_ids', None)
+    if team_ids is None:
+        team_ids = frozenset(user.teams.values_list('id', flat=True))
+    return team_ids
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """
+    Token authentication that caches the resolved principal in process,
+    so an authenticated request usually runs no user or token queries.
+
+    `request.user` is a lightweight `User` holding only the id, username and
+    a `team_ids` set; it is enough to attribute bookings to the user.
+    `request.auth` is the token key.
+    """
+
+    def authenticate_credentials(self, key):
+        principal = principal_cache.get(key)
+
+        if principal is None:
+            model = self.get_model()
+            try:
+                token = model.objects.select_related('user').get(key=key)
+            except model.DoesNotExist:
+                raise exceptions.AuthenticationFailed('Invalid token.')
+
+            if not token.user.is_active:
+                raise exceptions.AuthenticationFailed('User inactive or deleted.')
+
+            principal = Principal(
+                user_id=token.user.id,
+                username=token.user.username,
+                team_ids=frozenset(token.user.teams.values_list('id', flat=True)),
+            )
+            principal_cache.set(key, principal)
+
+        return (self.get_user(principal), key)
+
+    @staticmethod
+    def get_user(principal):
+        # Build the user from the cached principal instead of loading it.
+        user = User(id=principal.user_id, username=principal.username, is_active=True)
+        user._state.adding = False
+        user._state.db = 'default'
+        user.team_ids = principal.team_ids
+        return user
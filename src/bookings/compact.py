@@ -0,0 +1,75 @@
+"""
+Compact, normalized payloads for high-volume clients (MessagePack).
+
+Instead of repeating the room in every booking, a payload carries the rooms
+once and bookings point at them by id. Timestamps are integer epoch seconds
+and booking ids are their 16 raw bytes.
+
+    rooms:    [id, name, room_type, capacity]
+    bookings: [id, room_id, booked_by, start_time, end_time]
+
+The `decode_*` helpers turn a response body back into the same shape as the
+JSON API. They only need `msgpack`, so clients can use them without Django.
+"""
+import uuid
+from datetime import datetime, timezone
+
+import msgpack
+
+MEDIA_TYPE = 'application/x-msgpack'
+
+def compact_rooms(rooms):
+    """
+    Returns the compact rows for an iterable of Rooms.
+    """
+    return [[room.id, room.name, room.get_room_type_display(), room.capacity] for room in rooms]
+
+def compact_bookings(bookings):
+    """
+    Returns a {"rooms": [...], "bookings": [...]} payload for an iterable of
+    Bookings, with each referenced room included once.
+    """
+    rooms = {}
+    rows = []
+    for booking in bookings:
+        rooms.setdefault(booking.room_id, booking.room)
+        rows.append([
+            booking.id.bytes,
+            booking.room_id,
+            booking.booked_by.username,
+            int(booking.start_time.timestamp()),
+            int(booking.end_time.timestamp()),
+        ])
+    return {'rooms': compact_rooms(rooms.values()), 'bookings': rows}
+
+def _room(row):
+    room_id, name, room_type, capacity = row
+    return {'id': room_id, 'name': name, 'room_type': room_type, 'capacity': capacity}
+
+def _timestamp(seconds):
+    return datetime.fromtimestamp(seconds, tz=timezone.utc)
+
+def decode_rooms(content):
+    """
+    Decodes an available-rooms response into a list of room dicts.
+    """
+    return [_room(row) for row in msgpack.unpackb(content)]
+
+def decode_bookings(content):
+    """
+    Decodes a (paginated) bookings response into the JSON API's shape:
+    {"count", "next", "previous", "results": [booking dicts with nested rooms]}.
+    """
+    page = msgpack.unpackb(content)
+    rooms = {row[0]: _room(row) for row in page['results']['rooms']}
+    page['results'] = [
+        {
+            'id': uuid.UUID(bytes=booking_id),
+            'room': rooms[room_id],
+            'booked_by': booked_by,
+            'start_time': _timestamp(start_time),
+            'end_time': _timestamp(end_time),
+        }
+        for booking_id, room_id, booked_by, start_time, end_time in page['results']['bookings']
+    ]
+    return page
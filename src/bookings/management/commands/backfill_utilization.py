@@ -0,0 +1,52 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from bookings.models import Booking, RoomHourlyUsage, Site
+from bookings.routers import database_for_site
+
+# Bookings read and rolled up per batch
+BATCH_SIZE = 2000
+
+
+class Command(BaseCommand):
+    """
+    Rebuilds the hourly utilization rollup from the bookings.
+    """
+    help = "Rebuilds the room utilization rollup (RoomHourlyUsage) from Booking."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--site', help='Only rebuild this site (slug). Defaults to every site.')
+
+    def handle(self, *args, **options):
+        sites = Site.objects.all()
+        if options['site']:
+            sites = sites.filter(slug=options['site'])
+            if not sites.exists():
+                raise CommandError(f"Site '{options['site']}' does not exist.")
+
+        for site in sites:
+            db = database_for_site(site)
+
+            # Rebuild the whole site at once, so reports never see half of it.
+            with transaction.atomic(using=db):
+                RoomHourlyUsage.objects.using(db).filter(site=site).delete()
+
+                bookings = (
+                    Booking.objects.using(db)
+                    .filter(site=site)
+                    .values_list('site_id', 'room_id', 'start_time', 'end_time')
+                    .order_by()
+                    .iterator(chunk_size=BATCH_SIZE)
+                )
+                batch = []
+                count = 0
+                for booking in bookings:
+                    batch.append(booking)
+                    if len(batch) == BATCH_SIZE:
+                        RoomHourlyUsage.objects.using(db).add_bookings(batch)
+                        count += len(batch)
+                        batch = []
+                RoomHourlyUsage.objects.using(db).add_bookings(batch)
+                count += len(batch)
+
+            self.stdout.write(f"Rolled up {count} bookings for site '{site.slug}'.")
@@ -0,0 +1,79 @@
+import json
+import timeit
+import uuid
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+
+from bookings.compact import compact_bookings, decode_bookings
+from bookings.models import Booking, Room, RoomType
+from bookings.renderers import MessagePackRenderer
+from bookings.serializers import BookingSerializer
+
+
+class Command(BaseCommand):
+    """
+    Compares the JSON and compact MessagePack bookings payloads:
+    size, time to encode on the server and time to decode on a client.
+    Uses in-memory bookings, so it doesn't need a database.
+    """
+    help = "Benchmarks the JSON and MessagePack formats of the bookings list."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--bookings', type=int, default=100, help='Bookings per payload (the max page size is 100).')
+        parser.add_argument('--repeat', type=int, default=200, help='How often each step is timed.')
+
+    def handle(self, *args, **options):
+        bookings = self.make_bookings(options['bookings'])
+        repeat = options['repeat']
+
+        def page(results):
+            # The shape the paginated bookings list returns
+            return {'count': len(bookings), 'next': None, 'previous': None, 'results': results}
+
+        json_renderer = JSONRenderer()
+        msgpack_renderer = MessagePackRenderer()
+
+        encode_json = lambda: json_renderer.render(page(BookingSerializer(bookings, many=True).data))
+        encode_msgpack = lambda: msgpack_renderer.render(page(compact_bookings(bookings)))
+        json_body = encode_json()
+        msgpack_body = encode_msgpack()
+
+        results = [
+            ('JSON', len(json_body), self.time(encode_json, repeat), self.time(lambda: json.loads(json_body), repeat)),
+            ('MessagePack', len(msgpack_body), self.time(encode_msgpack, repeat), self.time(lambda: decode_bookings(msgpack_body), repeat)),
+        ]
+
+        self.stdout.write(f"{len(bookings)} bookings per payload, best of {repeat} runs:")
+        self.stdout.write(f"  {'format':<12} {'bytes':>8} {'encode ms':>10} {'decode ms':>10}")
+        for name, size, encode, decode in results:
+            self.stdout.write(f"  {name:<12} {size:>8} {encode * 1000:>10.3f} {decode * 1000:>10.3f}")
+
+    @staticmethod
+    def time(func, repeat):
+        return min(timeit.repeat(func, number=1, repeat=repeat))
+
+    @staticmethod
+    def make_bookings(count):
+        # The seeded layout: 8 private rooms, 4 conference rooms and 3 shared desks
+        room_types = [RoomType.PRIVATE] * 8 + [RoomType.CONFERENCE] * 4 + [RoomType.SHARED] * 3
+        rooms = [
+            Room(id=i, name=f"{room_type.label} {i}", room_type=room_type, capacity=1)
+            for i, room_type in enumerate(room_types, start=1)
+        ]
+        user = User(id=1, username='testuser')
+        start = timezone.now().replace(minute=0, second=0, microsecond=0)
+
+        return [
+            Booking(
+                id=uuid.uuid4(),
+                room=rooms[i % len(rooms)],
+                booked_by=user,
+                start_time=start + timedelta(hours=i),
+                end_time=start + timedelta(hours=i + 1),
+            )
+            for i in range(count)
+        ]
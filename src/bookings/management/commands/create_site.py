@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from bookings.models import Room, Site
+from bookings.routers import database_for_site
+
+# The same room layout the original building was seeded with (see migration 0002)
+ROOMS_TO_CREATE = {
+    'PRIVATE': {'count': 8, 'capacity': 1},
+    'CONFERENCE': {'count': 4, 'capacity': 10},
+    'SHARED': {'count': 3, 'capacity': 4},
+}
+
+
+class Command(BaseCommand):
+    """
+    Creates a new site and seeds its room catalog in the site's database.
+    """
+    help = "Creates a site and seeds its rooms (in the site's shard, if it has one)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('slug', help='Short identifier used in URLs and in SITE_SHARDS.')
+        parser.add_argument('name', help='Human-readable name of the site.')
+        parser.add_argument('--no-rooms', action='store_true', help="Don't seed the default room layout.")
+
+    def handle(self, *args, **options):
+        if Site.objects.filter(slug=options['slug']).exists():
+            raise CommandError(f"Site '{options['slug']}' already exists.")
+
+        site = Site.objects.create(slug=options['slug'], name=options['name'])
+        db = database_for_site(site)
+
+        if not options['no_rooms']:
+            rooms = [
+                Room(site=site, name=f"{room_type.capitalize()} {i}", room_type=room_type, capacity=details['capacity'])
+                for room_type, details in ROOMS_TO_CREATE.items()
+                for i in range(1, details['count'] + 1)
+            ]
+            with transaction.atomic(using=db):
+                Room.objects.using(db).bulk_create(rooms)
+
+        self.stdout.write(f"Created site '{site.slug}' in database '{db}'.")
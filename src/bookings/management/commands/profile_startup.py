@@ -0,0 +1,79 @@
+import os
+import subprocess
+import sys
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# The code a fresh worker runs before it can serve its first request:
+# app setup plus loading every URL (and therefore every view).
+STARTUP_CODE = (
+    "import django; django.setup(); "
+    "from django.urls import get_resolver; get_resolver().url_patterns"
+)
+
+
+class Command(BaseCommand):
+    """
+    Measures how long a fresh worker takes to start, and which modules
+    that time is spent importing (using Python's `-X importtime`).
+    """
+    help = "Profiles worker startup and reports import time per module."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limit', type=int, default=20, help='Number of modules to list.')
+        parser.add_argument('--api-only', action='store_true', help='Profile the slim, API-only mode (DJANGO_API_ONLY=1).')
+
+    def handle(self, *args, **options):
+        env = os.environ.copy()
+        env.setdefault('DJANGO_SETTINGS_MODULE', settings.SETTINGS_MODULE)
+        if options['api_only']:
+            env['DJANGO_API_ONLY'] = '1'
+
+        # Run the startup in a new interpreter, so nothing is imported yet.
+        started = time.perf_counter()
+        result = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', STARTUP_CODE],
+            env=env,
+            capture_output=True,
+            text=True,
+        )
+        elapsed = time.perf_counter() - started
+
+        if result.returncode != 0:
+            raise CommandError(f"Startup failed:\n{result.stderr}")
+
+        modules = self.parse_importtime(result.stderr)
+
+        # Group self time by top-level package (django, rest_framework, ...)
+        packages = defaultdict(int)
+        for name, self_us, _ in modules:
+            packages[name.split('.')[0]] += self_us
+
+        self.stdout.write(f"Startup took {elapsed * 1000:.0f} ms ({len(modules)} modules imported).\n")
+
+        self.stdout.write("Slowest modules (self / cumulative ms):")
+        for name, self_us, cumulative_us in sorted(modules, key=lambda m: m[1], reverse=True)[:options['limit']]:
+            self.stdout.write(f"  {self_us / 1000:8.1f} {cumulative_us / 1000:8.1f}  {name}")
+
+        self.stdout.write("\nImport time per package (ms):")
+        for package, self_us in sorted(packages.items(), key=lambda p: p[1], reverse=True)[:options['limit']]:
+            self.stdout.write(f"  {self_us / 1000:8.1f}  {package}")
+
+    @staticmethod
+    def parse_importtime(output):
+        """
+        Parses `-X importtime` output into (module, self_us, cumulative_us) tuples.
+        """
+        modules = []
+        for line in output.splitlines():
+            if not line.startswith('import time:'):
+                continue
+            self_us, cumulative_us, name = line[len('import time:'):].split('|')
+            # Skip the header line ("self [us] | cumulative | imported package")
+            if not self_us.strip().isdigit():
+                continue
+            modules.append((name.strip(), int(self_us), int(cumulative_us)))
+        return modules
@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from bookings.models import BookingHold
+from bookings.routers import site_databases
+
+# Expired holds deleted per statement
+BATCH_SIZE = 1000
+
+
+class Command(BaseCommand):
+    """
+    Deletes expired holds in batches. Requests already ignore expired holds,
+    so this only keeps the table small; run it periodically (e.g. from cron).
+    """
+    help = "Deletes expired booking holds from every site database."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE, help='Holds deleted per statement.')
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        for db in site_databases():
+            reaped = 0
+            while True:
+                expired_ids = list(
+                    BookingHold.objects.using(db).filter(expires_at__lte=now)
+                    .order_by().values_list('id', flat=True)[:options['batch_size']]
+                )
+                if not expired_ids:
+                    break
+                reaped += len(BookingHold.objects.using(db).filter(id__in=expired_ids).delete_returning('id'))
+
+            self.stdout.write(f"Reaped {reaped} expired holds from database '{db}'.")
@@ -0,0 +1,48 @@
+# Generated by Django 4.2.6 on 2026-10-18 10:12
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('bookings', '0002_seed_rooms'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Site',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100)),
+                ('slug', models.SlugField(unique=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='room',
+            name='site',
+            field=models.ForeignKey(db_constraint=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='rooms', to='bookings.site'),
+        ),
+        migrations.AddField(
+            model_name='booking',
+            name='site',
+            field=models.ForeignKey(db_constraint=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='bookings', to='bookings.site'),
+        ),
+        migrations.AlterField(
+            model_name='booking',
+            name='booked_by',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.CASCADE, related_name='bookings', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AlterField(
+            model_name='booking',
+            name='team',
+            field=models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='bookings', to='bookings.team'),
+        ),
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['site', 'start_time'], name='booking_site_start_idx'),
+        ),
+    ]
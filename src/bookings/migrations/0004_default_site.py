@@ -0,0 +1,32 @@
+# Generated by Django 4.2.6 on 2026-10-18 10:14
+
+from django.db import migrations
+
+# Matches settings.DEFAULT_SITE at the time of writing
+DEFAULT_SITE = {'slug': 'main', 'name': 'Main'}
+
+def create_default_site(apps, schema_editor):
+    # Every room seeded so far belongs to the one building we had,
+    # so it becomes the default site.
+    Site = apps.get_model('bookings', 'Site')
+    Room = apps.get_model('bookings', 'Room')
+    Booking = apps.get_model('bookings', 'Booking')
+    site, _ = Site.objects.get_or_create(slug=DEFAULT_SITE['slug'], defaults={'name': DEFAULT_SITE['name']})
+    Room.objects.filter(site__isnull=True).update(site=site)
+    Booking.objects.filter(site__isnull=True).update(site=site)
+
+def delete_default_site(apps, schema_editor):
+    # This function allows us to reverse the migration if needed
+    Site = apps.get_model('bookings', 'Site')
+    Site.objects.filter(slug=DEFAULT_SITE['slug']).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0003_sites'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_default_site, reverse_code=delete_default_site),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 4.2.6 on 2026-10-18 10:15
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0004_default_site'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='room',
+            name='site',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.CASCADE, related_name='rooms', to='bookings.site'),
+        ),
+        migrations.AlterField(
+            model_name='booking',
+            name='site',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.CASCADE, related_name='bookings', to='bookings.site'),
+        ),
+    ]
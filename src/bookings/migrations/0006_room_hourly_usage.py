@@ -0,0 +1,28 @@
+# Generated by Django 4.2.6 on 2026-10-18 22:29
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0005_site_required'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RoomHourlyUsage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('hour', models.DateTimeField()),
+                ('booked_minutes', models.IntegerField(default=0)),
+                ('room', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='hourly_usage', to='bookings.room')),
+                ('site', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.CASCADE, related_name='room_usage', to='bookings.site')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['site', 'hour'], name='usage_site_hour_idx')],
+                'unique_together': {('room', 'hour')},
+            },
+        ),
+    ]
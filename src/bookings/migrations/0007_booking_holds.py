@@ -0,0 +1,33 @@
+# Generated by Django 4.2.6 on 2026-10-18 22:31
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('bookings', '0006_room_hourly_usage'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BookingHold',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('start_time', models.DateTimeField()),
+                ('end_time', models.DateTimeField()),
+                ('expires_at', models.DateTimeField()),
+                ('held_by', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.CASCADE, related_name='holds', to=settings.AUTH_USER_MODEL)),
+                ('room', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='holds', to='bookings.room')),
+                ('site', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.CASCADE, related_name='holds', to='bookings.site')),
+                ('team', models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='holds', to='bookings.team')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['site', 'start_time'], name='hold_site_start_idx'), models.Index(fields=['expires_at'], name='hold_expires_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 4.2.6 on 2026-10-19 09:05
+
+from django.db import migrations
+
+# Created in this order so rooms exist before the tables pointing at them
+SHARDED_MODELS = ['Room', 'Booking', 'BookingHold', 'RoomHourlyUsage']
+
+def create_shard_tables(apps, schema_editor):
+    # Shards skip 0001-0007: those would link bookings to the users and
+    # teams tables, which only exist in the default database. Instead, the
+    # sharded tables are created here as they are at this migration.
+    existing = set(schema_editor.connection.introspection.table_names())
+    for name in SHARDED_MODELS:
+        model = apps.get_model('bookings', name)
+        # Shards set up before this migration already have their tables
+        if model._meta.db_table not in existing:
+            schema_editor.create_model(model)
+
+def drop_shard_tables(apps, schema_editor):
+    # This function allows us to reverse the migration if needed
+    for name in reversed(SHARDED_MODELS):
+        schema_editor.delete_model(apps.get_model('bookings', name))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0007_booking_holds'),
+    ]
+
+    operations = [
+        # Only runs on shard databases (see bookings.routers.SiteRouter)
+        migrations.RunPython(create_shard_tables, reverse_code=drop_shard_tables, hints={'shard_schema': True}),
+    ]
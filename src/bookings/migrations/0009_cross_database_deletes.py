@@ -0,0 +1,56 @@
+# Generated by Django 4.2.6 on 2026-10-18 23:05
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('bookings', '0008_shard_schema'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='booking',
+            name='booked_by',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='bookings', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AlterField(
+            model_name='booking',
+            name='site',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='bookings', to='bookings.site'),
+        ),
+        migrations.AlterField(
+            model_name='booking',
+            name='team',
+            field=models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='bookings', to='bookings.team'),
+        ),
+        migrations.AlterField(
+            model_name='bookinghold',
+            name='held_by',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='holds', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AlterField(
+            model_name='bookinghold',
+            name='site',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='holds', to='bookings.site'),
+        ),
+        migrations.AlterField(
+            model_name='bookinghold',
+            name='team',
+            field=models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='holds', to='bookings.team'),
+        ),
+        migrations.AlterField(
+            model_name='room',
+            name='site',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='rooms', to='bookings.site'),
+        ),
+        migrations.AlterField(
+            model_name='roomhourlyusage',
+            name='site',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='room_usage', to='bookings.site'),
+        ),
+    ]
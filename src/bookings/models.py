@@ -1,6 +1,11 @@
 import uuid
-from django.db import models
+from collections import defaultdict
+from datetime import timedelta
+from django.db import models, connections
+from django.db.models import sql
+from django.core.exceptions import EmptyResultSet
 from django.contrib.auth.models import User
+from django.utils import timezone
 
 # Choices for Gender
 class Gender(models.TextChoices):
@@ -21,6 +26,19 @@ class UserProfile(models.Model):
     def __str__(self):
         return f"{self.user.username}'s Profile"
 
+class Site(models.Model):
+    """
+    Represents a building (site) with its own rooms and bookings.
+    Each site's rooms and bookings may live in their own database (shard),
+    see `bookings.routers`.
+    """
+    name = models.CharField(max_length=100)
+    # Used in the URL of the site-scoped endpoints and to pick the site's database.
+    slug = models.SlugField(max_length=50, unique=True)
+
+    def __str__(self):
+        return self.name
+
 # Let's define choices for Room Types to ensure data consistency.
 # This prevents typos like 'private' vs 'Private'.
 class RoomType(models.TextChoices):
@@ -32,6 +50,11 @@ class Room(models.Model):
     """
     Represents a workspace room.
     """
+    # The Site lives in the default database while the room may live in a
+    # shard, so we can't have a database-level foreign key constraint.
+    # Django's cascade only looks in the site's database, so deleting a site
+    # deletes its rooms in a signal handler instead (see `bookings.signals`).
+    site = models.ForeignKey(Site, on_delete=models.DO_NOTHING, related_name='rooms', db_constraint=False)
     name = models.CharField(max_length=100)
     room_type = models.CharField(max_length=20, choices=RoomType.choices)
     capacity = models.PositiveIntegerField()
@@ -51,6 +74,62 @@ class Team(models.Model):
     def __str__(self):
         return self.name
 
+class DeleteReturningQuerySet(models.QuerySet):
+    """
+    Custom QuerySet for bookings and holds, which can be deleted in one query.
+    """
+
+    def delete_returning(self, *field_names):
+        """
+        Deletes every row matched by this QuerySet in a single
+        `DELETE ... RETURNING` statement and returns the requested columns
+        of the deleted rows as a list of tuples (defaults to just the `id`).
+
+        Unlike `QuerySet.delete()`, this skips Django's cascade collector and
+        the delete signals. That is safe because no other model points at a
+        Booking or a BookingHold, so there is nothing to cascade to.
+        """
+        if self.query.is_sliced:
+            raise TypeError("Cannot use 'limit' or 'offset' with delete_returning().")
+
+        field_names = field_names or ('id',)
+        fields = [self.model._meta.get_field(name) for name in field_names]
+
+        # Route the statement like QuerySet.delete() does (to the write database).
+        queryset = self._chain()
+        queryset._for_write = True
+        connection = connections[queryset.db]
+
+        query = queryset.query.chain(sql.DeleteQuery)
+        try:
+            delete_sql, params = query.get_compiler(connection=connection).as_sql()
+        except EmptyResultSet:
+            # e.g. `id__in=[]`: nothing can match, so don't hit the database.
+            return []
+
+        table = self.model._meta.db_table
+        returning = ', '.join(connection.ops.quote_name(field.column) for field in fields)
+        # Convert raw column values the same way a normal SELECT would.
+        columns = [field.get_col(table) for field in fields]
+        converters = [
+            connection.ops.get_db_converters(column) + field.get_db_converters(connection)
+            for field, column in zip(fields, columns)
+        ]
+
+        with connection.cursor() as cursor:
+            cursor.execute(f"{delete_sql} RETURNING {returning}", params)
+            rows = cursor.fetchall()
+
+        results = []
+        for row in rows:
+            values = []
+            for value, column, column_converters in zip(row, columns, converters):
+                for converter in column_converters:
+                    value = converter(value, column, connection)
+                values.append(value)
+            results.append(tuple(values))
+        return results
+
 class Booking(models.Model):
     """
     Represents a booking for a room by a user or a team.
@@ -62,18 +141,27 @@ class Booking(models.Model):
     # Many bookings can belong to one room.
     # on_delete=models.CASCADE means if a Room is deleted, all its bookings are also deleted.
     room = models.ForeignKey(Room, on_delete=models.CASCADE, related_name='bookings')
+
+    # Copied from the room, so availability checks can filter by site without a join.
+    # Sites, users and teams live in the default database while the booking may
+    # live in a site's shard, so these foreign keys have no database constraint.
+    # Deleting one of them deletes its bookings in every site database in a
+    # signal handler (see `bookings.signals`), hence DO_NOTHING.
+    site = models.ForeignKey(Site, on_delete=models.DO_NOTHING, related_name='bookings', db_constraint=False)
     
     # The user who created the booking.
-    booked_by = models.ForeignKey(User, on_delete=models.CASCADE, related_name='bookings')
+    booked_by = models.ForeignKey(User, on_delete=models.DO_NOTHING, related_name='bookings', db_constraint=False)
     
     # A booking can be for a team. This is optional (nullable).
-    team = models.ForeignKey(Team, on_delete=models.CASCADE, related_name='bookings', null=True, blank=True)
+    team = models.ForeignKey(Team, on_delete=models.DO_NOTHING, related_name='bookings', null=True, blank=True, db_constraint=False)
     
     start_time = models.DateTimeField()
     end_time = models.DateTimeField()
     
     created_at = models.DateTimeField(auto_now_add=True)
 
+    objects = DeleteReturningQuerySet.as_manager()
+
     def __str__(self):
         return f"Booking for {self.room.name} from {self.start_time} to {self.end_time}"
 
@@ -81,4 +169,134 @@ class Booking(models.Model):
         # This ensures that we can't have two bookings for the same room at the exact same start time.
         # The true overlap logic will be handled in the API logic layer.
         unique_together = ('room', 'start_time',)
-        ordering = ['start_time']
\ No newline at end of file
+        ordering = ['start_time']
+        indexes = [
+            # Overlap checks always look at a single site's bookings.
+            models.Index(fields=['site', 'start_time'], name='booking_site_start_idx'),
+        ]
+
+def split_into_hours(start_time, end_time):
+    """
+    Splits a time range into (start of hour, minutes booked in that hour) pairs.
+    """
+    hour = start_time.replace(minute=0, second=0, microsecond=0)
+    while hour < end_time:
+        next_hour = hour + timedelta(hours=1)
+        minutes = (min(end_time, next_hour) - max(start_time, hour)).total_seconds() / 60
+        yield hour, round(minutes)
+        hour = next_hour
+
+class RoomHourlyUsageQuerySet(models.QuerySet):
+    """
+    Custom QuerySet for the utilization rollup.
+    """
+
+    def add_bookings(self, bookings, sign=1):
+        """
+        Adds (or with `sign=-1`, removes) the booked minutes of the given
+        bookings to the rollup. `bookings` are (site_id, room_id, start_time,
+        end_time) tuples, e.g. from `Booking.objects.delete_returning()`.
+
+        Every affected row is updated in place with
+        `INSERT ... ON CONFLICT DO UPDATE`, so concurrent bookings of the same
+        room in the same hour can't overwrite each other.
+        """
+        deltas = defaultdict(int)
+        for site_id, room_id, start_time, end_time in bookings:
+            for hour, minutes in split_into_hours(start_time, end_time):
+                deltas[(site_id, room_id, hour)] += sign * minutes
+
+        if not deltas:
+            return
+
+        queryset = self._chain()
+        queryset._for_write = True
+        connection = connections[queryset.db]
+        qn = connection.ops.quote_name
+        opts = self.model._meta
+
+        table = qn(opts.db_table)
+        site, room, hour, booked_minutes = (
+            qn(opts.get_field(name).column) for name in ('site', 'room', 'hour', 'booked_minutes')
+        )
+        upsert_sql = (
+            f"INSERT INTO {table} ({site}, {room}, {hour}, {booked_minutes}) VALUES (%s, %s, %s, %s) "
+            f"ON CONFLICT ({room}, {hour}) DO UPDATE SET {booked_minutes} = {table}.{booked_minutes} + EXCLUDED.{booked_minutes}"
+        )
+        params = [
+            (site_id, room_id, connection.ops.adapt_datetimefield_value(hour_start), minutes)
+            for (site_id, room_id, hour_start), minutes in deltas.items()
+        ]
+
+        with connection.cursor() as cursor:
+            cursor.executemany(upsert_sql, params)
+
+class RoomHourlyUsage(models.Model):
+    """
+    Rollup of booked minutes per room per hour.
+    It is updated as bookings are created and cancelled, so utilization
+    reports aggregate these rows instead of scanning every booking.
+    Rebuild it with `manage.py backfill_utilization`.
+    """
+    # Lives next to the site's bookings (see `bookings.routers`) and is deleted with its room.
+    site = models.ForeignKey(Site, on_delete=models.DO_NOTHING, related_name='room_usage', db_constraint=False)
+    room = models.ForeignKey(Room, on_delete=models.CASCADE, related_name='hourly_usage')
+    # The start of the hour (UTC)
+    hour = models.DateTimeField()
+    booked_minutes = models.IntegerField(default=0)
+
+    objects = RoomHourlyUsageQuerySet.as_manager()
+
+    def __str__(self):
+        return f"{self.room.name} at {self.hour}: {self.booked_minutes} minutes"
+
+    class Meta:
+        unique_together = ('room', 'hour',)
+        indexes = [
+            # Reports always look at a single site over a time range.
+            models.Index(fields=['site', 'hour'], name='usage_site_hour_idx'),
+        ]
+
+class BookingHoldQuerySet(DeleteReturningQuerySet):
+    """
+    Custom QuerySet for holds.
+    """
+
+    def active(self):
+        # Expired holds are ignored right away and deleted later in batches
+        # (see `manage.py reap_holds`).
+        return self.filter(expires_at__gt=timezone.now())
+
+class BookingHold(models.Model):
+    """
+    A short-lived, tentative reservation of a room for a time slot.
+    While it is active nobody else can book the room for that slot, and
+    its owner can confirm it into a Booking.
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+
+    # Lives next to the site's bookings (see `bookings.routers`), so sites,
+    # users and teams can't have database-level foreign key constraints.
+    # Their holds are deleted in every site database by signal handlers.
+    site = models.ForeignKey(Site, on_delete=models.DO_NOTHING, related_name='holds', db_constraint=False)
+    room = models.ForeignKey(Room, on_delete=models.CASCADE, related_name='holds')
+    held_by = models.ForeignKey(User, on_delete=models.DO_NOTHING, related_name='holds', db_constraint=False)
+    team = models.ForeignKey(Team, on_delete=models.DO_NOTHING, related_name='holds', null=True, blank=True, db_constraint=False)
+
+    start_time = models.DateTimeField()
+    end_time = models.DateTimeField()
+
+    expires_at = models.DateTimeField()
+
+    objects = BookingHoldQuerySet.as_manager()
+
+    def __str__(self):
+        return f"Hold on {self.room.name} from {self.start_time} to {self.end_time}"
+
+    class Meta:
+        indexes = [
+            # Availability checks look for a site's holds overlapping a slot.
+            models.Index(fields=['site', 'start_time'], name='hold_site_start_idx'),
+            # The reaper looks for expired holds.
+            models.Index(fields=['expires_at'], name='hold_expires_idx'),
+        ]
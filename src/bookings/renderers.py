@@ -0,0 +1,31 @@
+import uuid
+from datetime import datetime
+
+import msgpack
+from rest_framework.renderers import BaseRenderer
+
+from .compact import MEDIA_TYPE
+
+def _default(obj):
+    # Values the compact payloads don't convert themselves,
+    # e.g. in error responses or the booking created by a POST.
+    if isinstance(obj, uuid.UUID):
+        return obj.bytes
+    if isinstance(obj, datetime):
+        return int(obj.timestamp())
+    return str(obj)
+
+class MessagePackRenderer(BaseRenderer):
+    """
+    Renders responses as MessagePack. Selected with
+    `Accept: application/x-msgpack` or `?format=msgpack`.
+    """
+    media_type = MEDIA_TYPE
+    format = 'msgpack'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return msgpack.packb(data, use_bin_type=True, default=_default)
@@ -0,0 +1,89 @@
+from django.conf import settings
+from django.db import connections
+from django.db.migrations.recorder import MigrationRecorder
+
+# Models whose rows are split across databases by site.
+# Everything else (users, teams, the site catalog) lives in the default database.
+SHARDED_MODELS = {'bookings.room', 'bookings.booking', 'bookings.bookinghold', 'bookings.roomhourlyusage'}
+
+# The migration that creates the sharded tables in a shard in one go
+SHARD_SCHEMA_MIGRATION = ('bookings', '0008_shard_schema')
+
+def database_for_site(site):
+    """
+    Returns the database alias holding the rooms and bookings of a site
+    (given as a Site or its slug). Sites without a shard use 'default'.
+    """
+    slug = getattr(site, 'slug', site)
+    return settings.SITE_DATABASES.get(slug, 'default')
+
+def site_databases():
+    """
+    Returns the aliases of every database holding rooms and bookings.
+    """
+    return sorted({'default', *settings.SITE_DATABASES.values()})
+
+class SiteRouter:
+    """
+    Database router that keeps each site's rooms and bookings in that
+    site's database (see `settings.SITE_DATABASES`).
+
+    Querysets for sharded models have no site to route on, so views pick
+    the database explicitly with `.using(database_for_site(site))`. The
+    router takes care of everything else: related lookups, relations across
+    databases and where migrations run.
+    """
+
+    def _db_for(self, model, **hints):
+        if model._meta.label_lower not in SHARDED_MODELS:
+            return 'default'
+
+        instance = hints.get('instance')
+        if instance is None:
+            return None
+        if instance._meta.label_lower == 'bookings.site':
+            # e.g. `site.rooms.all()`
+            return database_for_site(instance)
+        if instance._meta.label_lower in SHARDED_MODELS and instance._state.db:
+            # e.g. `booking.room`: rooms live next to their bookings, holds and usage.
+            return instance._state.db
+        return None
+
+    def db_for_read(self, model, **hints):
+        return self._db_for(model, **hints)
+
+    def db_for_write(self, model, **hints):
+        return self._db_for(model, **hints)
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Bookings and rooms point at sites, users and teams in the default
+        # database, which is why those foreign keys have no DB constraint.
+        if {obj1._meta.label_lower, obj2._meta.label_lower} & SHARDED_MODELS:
+            return True
+        return None
+
+    def __init__(self):
+        # Shards known to have the sharded tables; that never changes back.
+        self._shards_with_schema = set()
+
+    def _has_shard_schema(self, db):
+        if db not in self._shards_with_schema:
+            if SHARD_SCHEMA_MIGRATION not in MigrationRecorder(connections[db]).applied_migrations():
+                return False
+            self._shards_with_schema.add(db)
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if hints.get('shard_schema'):
+            # Creates the sharded tables, which the default database already has.
+            return db != 'default'
+        if db == 'default':
+            return True
+        # Shards only get the tables of the sharded models, so a write that is
+        # wrongly sent to a shard fails instead of succeeding silently. Data
+        # migrations (e.g. seeding rooms) only run on the default database.
+        # Migrations before SHARD_SCHEMA_MIGRATION are skipped on shards: their
+        # bookings have foreign keys to users and teams, which shards don't have.
+        if f'{app_label}.{model_name}' not in SHARDED_MODELS:
+            return False
+        return self._has_shard_schema(db)
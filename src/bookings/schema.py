@@ -0,0 +1,26 @@
+"""
+API schema annotations for the views.
+
+Slim, API-only workers (settings.API_ONLY) never generate a schema, so there
+these are no-ops and drf-spectacular is not imported at all.
+"""
+from django.conf import settings
+
+if settings.API_ONLY:
+    class _OpenApiTypes:
+        # Stands in for any `OpenApiTypes.<TYPE>` used in the annotations.
+        def __getattr__(self, name):
+            return name
+
+    OpenApiTypes = _OpenApiTypes()
+
+    def OpenApiParameter(*args, **kwargs):
+        return None
+
+    def extend_schema(*args, **kwargs):
+        def decorator(view):
+            return view
+        return decorator
+else:
+    from drf_spectacular.types import OpenApiTypes
+    from drf_spectacular.utils import OpenApiParameter, extend_schema
@@ -1,5 +1,5 @@
 from rest_framework import serializers
-from .models import Room, Booking, Team
+from .models import Room, Booking, BookingHold, Team
 from django.utils import timezone
 
 class RoomSerializer(serializers.ModelSerializer):
@@ -28,6 +28,16 @@ class BookingSerializer(serializers.ModelSerializer):
         model = Booking
         fields = ['id', 'room', 'booked_by', 'start_time', 'end_time']
 
+class BookingHoldSerializer(serializers.ModelSerializer):
+    """
+    Serializer for the BookingHold model.
+    """
+    room = RoomSerializer(read_only=True)
+
+    class Meta:
+        model = BookingHold
+        fields = ['id', 'room', 'start_time', 'end_time', 'expires_at']
+
 class BookingCreateSerializer(serializers.Serializer):
     """
     Serializer for creating a new booking. Handles input validation.
@@ -66,4 +76,51 @@ class BookingCreateSerializer(serializers.Serializer):
             if not Team.objects.filter(id=data['team_id']).exists():
                 raise serializers.ValidationError("Specified team does not exist.")
 
-        return data
\ No newline at end of file
+        return data
+
+class BookingBulkCancelSerializer(serializers.Serializer):
+    """
+    Serializer for cancelling many bookings at once. Handles input validation.
+    """
+    # Either an explicit list of booking ids...
+    booking_ids = serializers.ListField(child=serializers.UUIDField(), required=False, allow_empty=False)
+
+    # ...or a filter: every booking of a team, optionally limited to a time range.
+    team_id = serializers.IntegerField(required=False)
+    start_time = serializers.DateTimeField(required=False)
+    end_time = serializers.DateTimeField(required=False)
+
+    def validate(self, data):
+        """
+        Perform custom validation on the incoming data.
+        """
+        # Rule 1: We need at least one way to pick bookings, so a request
+        # can never cancel every booking in the system by accident.
+        if not data.get('booking_ids') and not data.get('team_id'):
+            raise serializers.ValidationError("Provide either 'booking_ids' or a 'team_id' filter.")
+
+        # Rule 2: If a time range is given, it must be valid.
+        start_time = data.get('start_time')
+        end_time = data.get('end_time')
+        if start_time and end_time and start_time >= end_time:
+            raise serializers.ValidationError("End time must be after start time.")
+
+        return data
+
+class UtilizationQuerySerializer(serializers.Serializer):
+    """
+    Serializer for the utilization report's query parameters. Handles input validation.
+    """
+    start_time = serializers.DateTimeField()
+    end_time = serializers.DateTimeField()
+    granularity = serializers.ChoiceField(choices=['hour', 'day', 'week'], default='day')
+    group_by = serializers.ChoiceField(choices=['room', 'room_type'], default='room')
+
+    def validate(self, data):
+        """
+        Perform custom validation on the incoming data.
+        """
+        if data['start_time'] >= data['end_time']:
+            raise serializers.ValidationError("End time must be after start time.")
+
+        return data
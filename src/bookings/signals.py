@@ -0,0 +1,74 @@
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models import Q
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from .authentication import principal_cache
+from .models import Booking, BookingHold, Room, RoomHourlyUsage, Site, Team
+from .routers import database_for_site, site_databases
+from .sites import site_cache
+
+# Keep the cached principals (see `bookings.authentication`) in sync with
+# users, tokens and team memberships, and the cached sites (see
+# `bookings.sites`) in sync with the sites.
+#
+# Rooms, bookings and holds may live in a site's shard, where Django's
+# cascade doesn't look. Deleting a site, user or team deletes them here.
+
+def delete_bookings_and_holds(bookings, holds):
+    """
+    Deletes the bookings and holds matching the given filters from every
+    site database, keeping the utilization rollup in step.
+    """
+    for db in site_databases():
+        with transaction.atomic(using=db):
+            deleted = Booking.objects.using(db).filter(bookings).delete_returning('site', 'room', 'start_time', 'end_time')
+            RoomHourlyUsage.objects.using(db).add_bookings(deleted, sign=-1)
+            BookingHold.objects.using(db).filter(holds).delete_returning()
+
+@receiver([post_save, post_delete], sender=User)
+def user_changed(sender, instance, **kwargs):
+    principal_cache.invalidate_users([instance.pk])
+
+@receiver(pre_delete, sender=User)
+def user_deleted(sender, instance, **kwargs):
+    delete_bookings_and_holds(Q(booked_by=instance), Q(held_by=instance))
+
+@receiver(post_delete, sender=Token)
+def token_deleted(sender, instance, **kwargs):
+    principal_cache.invalidate_key(instance.key)
+
+@receiver(m2m_changed, sender=Team.members.through)
+def team_members_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'pre_clear'):
+        return
+
+    if reverse:
+        # e.g. `user.teams.add(team)`: only this user's teams changed.
+        user_ids = [instance.pk]
+    elif action == 'pre_clear':
+        # e.g. `team.members.clear()`: read the members before they are removed.
+        user_ids = list(instance.members.values_list('id', flat=True))
+    else:
+        # e.g. `team.members.add(user)`
+        user_ids = pk_set
+
+    principal_cache.invalidate_users(user_ids)
+
+@receiver(pre_delete, sender=Team)
+def team_deleted(sender, instance, **kwargs):
+    # Deleting a team removes its memberships without an m2m_changed signal.
+    principal_cache.invalidate_users(instance.members.values_list('id', flat=True))
+    delete_bookings_and_holds(Q(team=instance), Q(team=instance))
+
+@receiver(pre_delete, sender=Site)
+def site_deleted(sender, instance, **kwargs):
+    # The cascade from its rooms deletes their bookings, holds and usage.
+    Room.objects.using(database_for_site(instance)).filter(site=instance).delete()
+
+@receiver([post_save, post_delete], sender=Site)
+def site_changed(sender, instance, **kwargs):
+    # A save may change the slug, so drop every cached site (they rarely change).
+    site_cache.clear()
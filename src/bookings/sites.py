@@ -0,0 +1,52 @@
+import threading
+import time
+
+from django.conf import settings
+
+from .models import Site
+
+class SiteCache:
+    """
+    A small thread-safe, in-process cache of sites keyed by slug, with a TTL.
+    It is cleared whenever a site is saved or deleted (see `bookings.signals`).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # slug -> (expires_at, site)
+        self._entries = {}
+
+    def get(self, slug):
+        with self._lock:
+            entry = self._entries.get(slug)
+            if entry is None:
+                return None
+            expires_at, site = entry
+            if expires_at <= time.monotonic():
+                del self._entries[slug]
+                return None
+            return site
+
+    def set(self, slug, site):
+        expires_at = time.monotonic() + settings.SITE_CACHE_TTL
+        with self._lock:
+            self._entries[slug] = (expires_at, site)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+site_cache = SiteCache()
+
+def get_site(slug):
+    """
+    Returns the Site with the given slug, or None if there is none.
+    Sites rarely change, so they are usually served from `site_cache`.
+    """
+    site = site_cache.get(slug)
+    if site is None:
+        site = Site.objects.filter(slug=slug).first()
+        # Unknown slugs aren't cached, so a new site is found right away.
+        if site is not None:
+            site_cache.set(slug, site)
+    return site
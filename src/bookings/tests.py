@@ -1,9 +1,27 @@
 from rest_framework.test import APITestCase
 from rest_framework import status
 from django.urls import reverse
-from .models import Room, RoomType, User, Team, Booking
+from .models import Room, RoomType, User, Team, Booking, BookingHold, Site, RoomHourlyUsage
 from datetime import datetime, timedelta
 from django.utils import timezone
+from django.conf import settings
+from unittest import skipUnless
+from .routers import database_for_site
+from .sites import get_site, site_cache
+from .authentication import CachedTokenAuthentication, principal_cache
+from rest_framework.authtoken.models import Token
+from rest_framework.exceptions import AuthenticationFailed
+from django.core.management import call_command
+from io import StringIO
+from django.db.models import Sum
+from .compact import MEDIA_TYPE, decode_bookings, decode_rooms
+import msgpack
+import importlib
+import tempfile
+from pathlib import Path
+from django.test import SimpleTestCase
+from django.urls import clear_url_caches
+from .management.commands.profile_startup import Command as ProfileStartupCommand
 
 class BookingAPITests(APITestCase):
     """
@@ -21,9 +39,12 @@ class BookingAPITests(APITestCase):
         Team.objects.all().delete()
         Booking.objects.all().delete()
 
+        # The default site is created by the migrations
+        self.site = Site.objects.get(slug=settings.DEFAULT_SITE)
+
         # Create predictable objects for our tests
-        self.private_room = Room.objects.create(name="Test Private Room", room_type=RoomType.PRIVATE, capacity=1)
-        self.conference_room = Room.objects.create(name="Test Conference Room", room_type=RoomType.CONFERENCE, capacity=10)
+        self.private_room = Room.objects.create(site=self.site, name="Test Private Room", room_type=RoomType.PRIVATE, capacity=1)
+        self.conference_room = Room.objects.create(site=self.site, name="Test Conference Room", room_type=RoomType.CONFERENCE, capacity=10)
 
         self.user1 = User.objects.create_user(username='user1', password='password')
         self.user2 = User.objects.create_user(username='user2', password='password')
@@ -108,6 +129,26 @@ class BookingAPITests(APITestCase):
         self.assertEqual(Booking.objects.count(), 0) # Assert no booking was created
 
 
+    def test_create_team_booking_fails_for_non_member(self):
+        """
+        Ensure only members of a team can book for it.
+        """
+        outsider = User.objects.create_user(username='outsider', password='password')
+        self.client.force_authenticate(user=outsider)
+
+        url = reverse('list-create-booking')
+        data = {
+            "start_time": self.start_time.isoformat(),
+            "end_time": self.end_time.isoformat(),
+            "booking_type": "team",
+            "team_id": self.large_team.id
+        }
+        response = self.client.post(url, data, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertEqual(Booking.objects.count(), 0)
+
+
     def test_booking_fails_when_no_rooms_available(self):
         """
         Ensure the API returns an error if no suitable rooms are available.
@@ -115,6 +156,7 @@ class BookingAPITests(APITestCase):
         # First, book the only private room
         Booking.objects.create(
             room=self.private_room,
+            site=self.site,
             booked_by=self.user1,
             start_time=self.start_time,
             end_time=self.end_time
@@ -131,4 +173,791 @@ class BookingAPITests(APITestCase):
 
         self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
         # We should still only have the one booking we created manually
-        self.assertEqual(Booking.objects.count(), 1)
\ No newline at end of file
+        self.assertEqual(Booking.objects.count(), 1)
+
+    def test_cancel_booking_success(self):
+        """
+        Ensure a booking can be cancelled by its id.
+        """
+        booking = Booking.objects.create(
+            room=self.private_room,
+            site=self.site,
+            booked_by=self.user1,
+            start_time=self.start_time,
+            end_time=self.end_time
+        )
+
+        url = reverse('cancel-booking', args=[booking.id])
+        response = self.client.post(url)
+
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertEqual(Booking.objects.count(), 0)
+
+        # Cancelling it a second time should report that it no longer exists
+        response = self.client.post(url)
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+    def test_bulk_cancel_by_ids(self):
+        """
+        Ensure a list of bookings can be cancelled in one request.
+        """
+        first = Booking.objects.create(
+            room=self.private_room,
+            site=self.site,
+            booked_by=self.user1,
+            start_time=self.start_time,
+            end_time=self.end_time
+        )
+        second = Booking.objects.create(
+            room=self.conference_room,
+            site=self.site,
+            booked_by=self.user1,
+            start_time=self.start_time,
+            end_time=self.end_time
+        )
+        kept = Booking.objects.create(
+            room=self.private_room,
+            site=self.site,
+            booked_by=self.user2,
+            start_time=self.end_time,
+            end_time=self.end_time + timedelta(hours=1)
+        )
+
+        url = reverse('bulk-cancel-booking')
+        data = {"booking_ids": [str(first.id), str(second.id)]}
+        response = self.client.post(url, data, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['count'], 2)
+        self.assertEqual(set(response.data['cancelled']), {first.id, second.id})
+        self.assertEqual(list(Booking.objects.all()), [kept])
+
+
+    def test_bulk_cancel_by_team_and_time_range(self):
+        """
+        Ensure a team's bookings inside a time range can be cancelled together.
+        """
+        in_range = Booking.objects.create(
+            room=self.conference_room,
+            site=self.site,
+            booked_by=self.user1,
+            team=self.large_team,
+            start_time=self.start_time,
+            end_time=self.end_time
+        )
+        # Same team, but the following week
+        Booking.objects.create(
+            room=self.conference_room,
+            site=self.site,
+            booked_by=self.user1,
+            team=self.large_team,
+            start_time=self.start_time + timedelta(days=7),
+            end_time=self.end_time + timedelta(days=7)
+        )
+        # Different team, same slot
+        Booking.objects.create(
+            room=self.private_room,
+            site=self.site,
+            booked_by=self.user1,
+            team=self.small_team,
+            start_time=self.start_time,
+            end_time=self.end_time
+        )
+
+        url = reverse('bulk-cancel-booking')
+        data = {
+            "team_id": self.large_team.id,
+            "start_time": self.start_time.isoformat(),
+            "end_time": (self.start_time + timedelta(days=1)).isoformat()
+        }
+        response = self.client.post(url, data, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['cancelled'], [in_range.id])
+        self.assertEqual(Booking.objects.count(), 2)
+
+
+    def test_bulk_cancel_rejects_other_users_bookings(self):
+        """
+        Ensure a user can't cancel a team's bookings or someone else's bookings.
+        """
+        team_booking = Booking.objects.create(
+            room=self.conference_room,
+            site=self.site,
+            booked_by=self.user2,
+            team=self.large_team,
+            start_time=self.start_time,
+            end_time=self.end_time
+        )
+        own_booking = Booking.objects.create(
+            room=self.private_room,
+            site=self.site,
+            booked_by=self.user2,
+            start_time=self.start_time,
+            end_time=self.end_time
+        )
+        outsider = User.objects.create_user(username='outsider', password='password')
+        self.client.force_authenticate(user=outsider)
+
+        url = reverse('bulk-cancel-booking')
+        response = self.client.post(url, {"team_id": self.large_team.id}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+        response = self.client.post(url, {"booking_ids": [str(team_booking.id), str(own_booking.id)]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+        self.assertEqual(Booking.objects.count(), 2)
+
+
+    def test_cancel_rejects_other_users_booking(self):
+        """
+        Ensure a user can't cancel a single booking that isn't theirs or their team's.
+        """
+        booking = Booking.objects.create(
+            room=self.private_room,
+            site=self.site,
+            booked_by=self.user2,
+            start_time=self.start_time,
+            end_time=self.end_time
+        )
+        team_booking = Booking.objects.create(
+            room=self.conference_room,
+            site=self.site,
+            booked_by=self.user2,
+            team=self.large_team,
+            start_time=self.start_time,
+            end_time=self.end_time
+        )
+        outsider = User.objects.create_user(username='outsider', password='password')
+        self.client.force_authenticate(user=outsider)
+
+        for other in (booking, team_booking):
+            response = self.client.post(reverse('cancel-booking', args=[other.id]))
+            self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(Booking.objects.count(), 2)
+
+        # A member of the team can cancel the team's booking
+        self.client.force_authenticate(user=self.user1)
+        response = self.client.post(reverse('cancel-booking', args=[team_booking.id]))
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertEqual(Booking.objects.count(), 1)
+
+
+    def test_bulk_cancel_requires_a_filter(self):
+        """
+        Ensure a bulk cancel without ids or a team is rejected.
+        """
+        Booking.objects.create(
+            room=self.private_room,
+            site=self.site,
+            booked_by=self.user1,
+            start_time=self.start_time,
+            end_time=self.end_time
+        )
+
+        url = reverse('bulk-cancel-booking')
+        data = {
+            "start_time": self.start_time.isoformat(),
+            "end_time": self.end_time.isoformat()
+        }
+        response = self.client.post(url, data, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(Booking.objects.count(), 1)
+
+
+class MultiSiteTests(APITestCase):
+    """
+    Test suite for the site-scoped endpoints and per-site databases.
+    """
+    # Sharded sites keep their rooms and bookings in other databases.
+    databases = '__all__'
+
+    def setUp(self):
+        self.main_site = Site.objects.get(slug=settings.DEFAULT_SITE)
+        # Use a configured shard if there is one, otherwise a site in the default database.
+        self.other_site = Site.objects.create(slug=next(iter(settings.SITE_DATABASES), 'north'), name="Other Site")
+        self.other_db = database_for_site(self.other_site)
+
+        self.main_room = Room.objects.create(site=self.main_site, name="Main Private", room_type=RoomType.PRIVATE, capacity=1)
+        self.other_room = Room.objects.using(self.other_db).create(site=self.other_site, name="Other Private", room_type=RoomType.PRIVATE, capacity=1)
+
+        self.user = User.objects.create_user(username='user1', password='password')
+        self.client.force_authenticate(user=self.user)
+
+        self.start_time = timezone.now() + timedelta(days=1)
+        self.end_time = self.start_time + timedelta(hours=1)
+
+
+    def test_sites_have_independent_availability(self):
+        """
+        Ensure a booking at one site doesn't affect availability at another.
+        """
+        Booking.objects.create(
+            room=self.main_room,
+            site=self.main_site,
+            booked_by=self.user,
+            start_time=self.start_time,
+            end_time=self.end_time
+        )
+
+        url = reverse('available-rooms', kwargs={'site_slug': self.other_site.slug})
+        response = self.client.get(url, {'start_time': self.start_time.isoformat(), 'end_time': self.end_time.isoformat()})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([room['id'] for room in response.data], [self.other_room.id])
+
+
+    def test_create_booking_for_site(self):
+        """
+        Ensure a site-scoped booking is stored in that site's database.
+        """
+        url = reverse('list-create-booking', kwargs={'site_slug': self.other_site.slug})
+        data = {
+            "start_time": self.start_time.isoformat(),
+            "end_time": self.end_time.isoformat(),
+            "booking_type": "individual"
+        }
+        response = self.client.post(url, data, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['room']['id'], self.other_room.id)
+        self.assertEqual(Booking.objects.using(self.other_db).filter(site=self.other_site).count(), 1)
+
+        response = self.client.get(url)
+        self.assertEqual(response.data['count'], 1)
+        self.assertEqual(response.data['results'][0]['booked_by'], 'user1')
+
+
+    @skipUnless(settings.SITE_DATABASES, "No site shards configured (set SITE_SHARDS).")
+    def test_sharded_site_uses_its_own_database(self):
+        """
+        Ensure a sharded site's bookings never end up in the default database.
+        """
+        url = reverse('list-create-booking', kwargs={'site_slug': self.other_site.slug})
+        data = {
+            "start_time": self.start_time.isoformat(),
+            "end_time": self.end_time.isoformat(),
+            "booking_type": "individual"
+        }
+        response = self.client.post(url, data, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertNotEqual(self.other_db, 'default')
+        self.assertEqual(Booking.objects.using(self.other_db).count(), 1)
+        self.assertEqual(Booking.objects.count(), 0)
+
+        url = reverse('cancel-booking', kwargs={'site_slug': self.other_site.slug, 'booking_id': response.data['id']})
+        response = self.client.post(url)
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertEqual(Booking.objects.using(self.other_db).count(), 0)
+
+
+    def test_deletes_reach_the_site_database(self):
+        """
+        Ensure deleting a user, team or site deletes its rows in the site's database.
+        """
+        url = reverse('list-create-booking', kwargs={'site_slug': self.other_site.slug})
+        data = {
+            "start_time": self.start_time.isoformat(),
+            "end_time": self.end_time.isoformat(),
+            "booking_type": "individual"
+        }
+        response = self.client.post(url, data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        colleague = User.objects.create_user(username='colleague', password='password')
+        team = Team.objects.create(name="Team")
+        later = self.end_time + timedelta(hours=1)
+        Booking.objects.using(self.other_db).create(
+            room=self.other_room, site=self.other_site, booked_by=colleague, team=team,
+            start_time=later, end_time=later + timedelta(hours=1)
+        )
+        RoomHourlyUsage.objects.using(self.other_db).add_bookings([(self.other_site.id, self.other_room.id, later, later + timedelta(hours=1))])
+        BookingHold.objects.using(self.other_db).create(
+            room=self.other_room, site=self.other_site, held_by=self.user,
+            start_time=later, end_time=later + timedelta(hours=1), expires_at=timezone.now() + timedelta(minutes=5)
+        )
+
+        team.delete()
+        self.assertEqual(Booking.objects.using(self.other_db).filter(booked_by=colleague).count(), 0)
+
+        self.user.delete()
+        self.assertEqual(Booking.objects.using(self.other_db).count(), 0)
+        self.assertEqual(BookingHold.objects.using(self.other_db).count(), 0)
+        usage = RoomHourlyUsage.objects.using(self.other_db).aggregate(total=Sum('booked_minutes'))['total']
+        self.assertEqual(usage, 0)
+
+        # Nothing left behind for the bookings list to trip over
+        self.client.force_authenticate(user=colleague)
+        response = self.client.get(url)
+        self.assertEqual(response.data['count'], 0)
+
+        self.other_site.delete()
+        self.assertFalse(Room.objects.using(self.other_db).filter(id=self.other_room.id).exists())
+        self.assertFalse(RoomHourlyUsage.objects.using(self.other_db).exists())
+
+
+    def test_sites_are_cached(self):
+        """
+        Ensure sites are looked up once and reloaded after they change.
+        """
+        site_cache.clear()
+        with self.assertNumQueries(1):
+            get_site(self.other_site.slug)
+        with self.assertNumQueries(0):
+            self.assertEqual(get_site(self.other_site.slug).name, "Other Site")
+
+        self.other_site.name = "Renamed Site"
+        self.other_site.save()
+
+        self.assertEqual(get_site(self.other_site.slug).name, "Renamed Site")
+
+
+    def test_unknown_site_returns_404(self):
+        """
+        Ensure the site-scoped endpoints reject sites that don't exist.
+        """
+        url = reverse('list-create-booking', kwargs={'site_slug': 'nowhere'})
+        response = self.client.get(url)
+
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class TokenAuthenticationTests(APITestCase):
+    """
+    Test suite for the cached token authentication.
+    """
+
+    def setUp(self):
+        # Cached principals outlive the database rows of earlier tests
+        principal_cache.clear()
+
+        site = Site.objects.get(slug=settings.DEFAULT_SITE)
+        Room.objects.create(site=site, name="Test Private Room", room_type=RoomType.PRIVATE, capacity=1)
+
+        self.user = User.objects.create_user(username='user1', password='password')
+        self.token = Token.objects.create(user=self.user)
+        self.team = Team.objects.create(name="Team")
+
+        self.start_time = timezone.now() + timedelta(days=1)
+        self.end_time = self.start_time + timedelta(hours=1)
+
+
+    def test_create_booking_with_token(self):
+        """
+        Ensure a booking is attributed to the user owning the token.
+        """
+        url = reverse('list-create-booking')
+        data = {
+            "start_time": self.start_time.isoformat(),
+            "end_time": self.end_time.isoformat(),
+            "booking_type": "individual"
+        }
+        response = self.client.post(url, data, format='json', HTTP_AUTHORIZATION=f'Token {self.token.key}')
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Booking.objects.get().booked_by, self.user)
+
+
+    def test_create_booking_requires_authentication(self):
+        """
+        Ensure anonymous clients can't create bookings.
+        """
+        url = reverse('list-create-booking')
+        data = {
+            "start_time": self.start_time.isoformat(),
+            "end_time": self.end_time.isoformat(),
+            "booking_type": "individual"
+        }
+        response = self.client.post(url, data, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(Booking.objects.count(), 0)
+
+
+    def test_principal_is_cached(self):
+        """
+        Ensure the token is only resolved once while it is cached.
+        """
+        authentication = CachedTokenAuthentication()
+
+        # The token (with its user) and the user's teams
+        with self.assertNumQueries(2):
+            user, _ = authentication.authenticate_credentials(self.token.key)
+        with self.assertNumQueries(0):
+            cached_user, _ = authentication.authenticate_credentials(self.token.key)
+
+        self.assertEqual(user, self.user)
+        self.assertEqual(cached_user, self.user)
+
+
+    def test_team_change_invalidates_principal(self):
+        """
+        Ensure a cached principal is reloaded when the user's teams change.
+        """
+        authentication = CachedTokenAuthentication()
+        user, _ = authentication.authenticate_credentials(self.token.key)
+        self.assertEqual(user.team_ids, frozenset())
+
+        self.team.members.add(self.user)
+
+        user, _ = authentication.authenticate_credentials(self.token.key)
+        self.assertEqual(user.team_ids, frozenset({self.team.id}))
+
+
+    def test_team_hold_uses_cached_memberships(self):
+        """
+        Ensure a token user can only hold rooms for teams they are in.
+        """
+        url = reverse('create-hold')
+        data = {
+            "start_time": self.start_time.isoformat(),
+            "end_time": self.end_time.isoformat(),
+            "booking_type": "team",
+            "team_id": self.team.id
+        }
+        response = self.client.post(url, data, format='json', HTTP_AUTHORIZATION=f'Token {self.token.key}')
+
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertEqual(BookingHold.objects.count(), 0)
+
+
+    def test_deleted_token_is_rejected(self):
+        """
+        Ensure a cached principal is dropped when its token is deleted.
+        """
+        authentication = CachedTokenAuthentication()
+        authentication.authenticate_credentials(self.token.key)
+
+        self.token.delete()
+
+        with self.assertRaises(AuthenticationFailed):
+            authentication.authenticate_credentials(self.token.key)
+
+
+class RoomUtilizationTests(APITestCase):
+    """
+    Test suite for the utilization rollup and report.
+    """
+
+    def setUp(self):
+        self.site = Site.objects.get(slug=settings.DEFAULT_SITE)
+        Room.objects.all().delete()
+        self.private_room = Room.objects.create(site=self.site, name="Test Private Room", room_type=RoomType.PRIVATE, capacity=1)
+        self.other_private_room = Room.objects.create(site=self.site, name="Other Private Room", room_type=RoomType.PRIVATE, capacity=1)
+
+        self.user = User.objects.create_user(username='user1', password='password')
+        self.client.force_authenticate(user=self.user)
+
+        # 10:30 to 12:00 tomorrow: 30 minutes in the first hour, 60 in the second
+        self.start_time = (timezone.now() + timedelta(days=1)).replace(hour=10, minute=30, second=0, microsecond=0)
+        self.end_time = self.start_time + timedelta(minutes=90)
+
+
+    def usage(self):
+        return list(RoomHourlyUsage.objects.order_by('hour').values_list('hour', 'booked_minutes'))
+
+
+    def test_rollup_follows_create_and_cancel(self):
+        """
+        Ensure booking and cancelling update the hourly rollup.
+        """
+        url = reverse('list-create-booking')
+        data = {
+            "start_time": self.start_time.isoformat(),
+            "end_time": self.end_time.isoformat(),
+            "booking_type": "individual"
+        }
+        response = self.client.post(url, data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        first_hour = self.start_time.replace(minute=0)
+        self.assertEqual(self.usage(), [(first_hour, 30), (first_hour + timedelta(hours=1), 60)])
+
+        url = reverse('cancel-booking', args=[response.data['id']])
+        self.client.post(url)
+
+        self.assertEqual(self.usage(), [(first_hour, 0), (first_hour + timedelta(hours=1), 0)])
+
+
+    def test_backfill_rebuilds_rollup(self):
+        """
+        Ensure the backfill command rolls up existing bookings.
+        """
+        Booking.objects.create(
+            room=self.private_room,
+            site=self.site,
+            booked_by=self.user,
+            start_time=self.start_time,
+            end_time=self.end_time
+        )
+
+        call_command('backfill_utilization', stdout=StringIO())
+        # Running it again must not count the booking twice
+        call_command('backfill_utilization', stdout=StringIO())
+
+        first_hour = self.start_time.replace(minute=0)
+        self.assertEqual(self.usage(), [(first_hour, 30), (first_hour + timedelta(hours=1), 60)])
+
+
+    def test_utilization_report_by_room_type(self):
+        """
+        Ensure the report aggregates the rollup per room type and day.
+        """
+        Booking.objects.create(
+            room=self.private_room,
+            site=self.site,
+            booked_by=self.user,
+            start_time=self.start_time,
+            end_time=self.end_time
+        )
+        call_command('backfill_utilization', stdout=StringIO())
+
+        day = self.start_time.replace(hour=0, minute=0)
+        url = reverse('room-utilization')
+        params = {
+            'start_time': day.isoformat(),
+            'end_time': (day + timedelta(days=1)).isoformat(),
+            'granularity': 'day',
+            'group_by': 'room_type',
+        }
+        response = self.client.get(url, params)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data), 1)
+        self.assertEqual(response.data[0]['period'], day)
+        self.assertEqual(response.data[0]['room_type'], RoomType.PRIVATE)
+        self.assertEqual(response.data[0]['booked_minutes'], 90)
+        # 90 minutes out of two private rooms for a whole day
+        self.assertEqual(response.data[0]['utilization'], round(90 / (2 * 24 * 60), 4))
+
+
+class BookingHoldTests(APITestCase):
+    """
+    Test suite for the two-phase (hold, then confirm) booking flow.
+    """
+    # The reaper cleans up every site database.
+    databases = '__all__'
+
+    def setUp(self):
+        self.site = Site.objects.get(slug=settings.DEFAULT_SITE)
+        Room.objects.all().delete()
+        # The only room an individual can book
+        self.private_room = Room.objects.create(site=self.site, name="Test Private Room", room_type=RoomType.PRIVATE, capacity=1)
+
+        self.user1 = User.objects.create_user(username='user1', password='password')
+        self.user2 = User.objects.create_user(username='user2', password='password')
+        self.client.force_authenticate(user=self.user1)
+
+        self.start_time = timezone.now() + timedelta(days=1)
+        self.end_time = self.start_time + timedelta(hours=1)
+        self.data = {
+            "start_time": self.start_time.isoformat(),
+            "end_time": self.end_time.isoformat(),
+            "booking_type": "individual"
+        }
+
+
+    def test_hold_and_confirm(self):
+        """
+        Ensure a hold can be confirmed into a booking.
+        """
+        response = self.client.post(reverse('create-hold'), self.data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['room']['id'], self.private_room.id)
+
+        response = self.client.post(reverse('confirm-hold', args=[response.data['id']]))
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['booked_by'], 'user1')
+        booking = Booking.objects.get()
+        self.assertEqual((booking.room, booking.booked_by), (self.private_room, self.user1))
+        self.assertEqual(BookingHold.objects.count(), 0)
+        self.assertEqual(RoomHourlyUsage.objects.aggregate(Sum('booked_minutes'))['booked_minutes__sum'], 60)
+
+
+    def test_held_room_is_not_available_to_others(self):
+        """
+        Ensure nobody else can book or see a room while it is held.
+        """
+        self.client.post(reverse('create-hold'), self.data, format='json')
+
+        self.client.force_authenticate(user=self.user2)
+        response = self.client.post(reverse('list-create-booking'), self.data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+        response = self.client.get(reverse('available-rooms'), {'start_time': self.data['start_time'], 'end_time': self.data['end_time']})
+        self.assertEqual(response.data, [])
+
+
+    def test_only_the_owner_can_confirm(self):
+        """
+        Ensure another user can't confirm someone else's hold.
+        """
+        response = self.client.post(reverse('create-hold'), self.data, format='json')
+
+        self.client.force_authenticate(user=self.user2)
+        response = self.client.post(reverse('confirm-hold', args=[response.data['id']]))
+
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(Booking.objects.count(), 0)
+
+
+    def test_expired_hold(self):
+        """
+        Ensure an expired hold frees the room, can't be confirmed and gets reaped.
+        """
+        with self.settings(BOOKING_HOLD_TTL=-1):
+            response = self.client.post(reverse('create-hold'), self.data, format='json')
+        hold_id = response.data['id']
+
+        response = self.client.post(reverse('confirm-hold', args=[hold_id]))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+        self.client.force_authenticate(user=self.user2)
+        response = self.client.post(reverse('list-create-booking'), self.data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        call_command('reap_holds', stdout=StringIO())
+        self.assertEqual(BookingHold.objects.count(), 0)
+
+
+    def test_confirming_a_duplicate_hold_conflicts(self):
+        """
+        Ensure holds that ended up on the same room can't both be confirmed.
+        """
+        expires_at = timezone.now() + timedelta(minutes=5)
+        holds = [
+            BookingHold.objects.create(
+                site=self.site, room=self.private_room, held_by=self.user1,
+                start_time=start_time, end_time=start_time + timedelta(hours=1), expires_at=expires_at
+            )
+            # The same slot, and an overlapping slot with a different start time
+            for start_time in (self.start_time, self.start_time, self.start_time + timedelta(minutes=30))
+        ]
+
+        response = self.client.post(reverse('confirm-hold', args=[holds[0].id]))
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        for hold in holds[1:]:
+            response = self.client.post(reverse('confirm-hold', args=[hold.id]))
+            self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+            self.assertIn('error', response.json())
+
+        self.assertEqual(Booking.objects.count(), 1)
+
+
+class MessagePackFormatTests(APITestCase):
+    """
+    Test suite for the compact MessagePack responses.
+    """
+
+    def setUp(self):
+        self.site = Site.objects.get(slug=settings.DEFAULT_SITE)
+        Room.objects.all().delete()
+        self.private_room = Room.objects.create(site=self.site, name="Test Private Room", room_type=RoomType.PRIVATE, capacity=1)
+        self.conference_room = Room.objects.create(site=self.site, name="Test Conference Room", room_type=RoomType.CONFERENCE, capacity=10)
+
+        self.user = User.objects.create_user(username='user1', password='password')
+
+        # Whole seconds, since the compact format sends epoch seconds
+        self.start_time = (timezone.now() + timedelta(days=1)).replace(microsecond=0)
+        self.end_time = self.start_time + timedelta(hours=1)
+
+
+    def test_available_rooms_as_msgpack(self):
+        """
+        Ensure the compact rooms decode to the same rooms as the JSON response.
+        """
+        params = {'start_time': self.start_time.isoformat(), 'end_time': self.end_time.isoformat()}
+        json_response = self.client.get(reverse('available-rooms'), params)
+        response = self.client.get(reverse('available-rooms'), params, HTTP_ACCEPT=MEDIA_TYPE)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Type'], MEDIA_TYPE)
+        self.assertEqual(decode_rooms(response.content), json_response.json())
+
+
+    def test_bookings_as_msgpack(self):
+        """
+        Ensure the normalized bookings decode to the same bookings as the JSON response.
+        """
+        for hours, room in enumerate([self.private_room, self.private_room, self.conference_room]):
+            Booking.objects.create(
+                room=room,
+                site=self.site,
+                booked_by=self.user,
+                start_time=self.start_time + timedelta(hours=hours),
+                end_time=self.end_time + timedelta(hours=hours)
+            )
+
+        json_response = self.client.get(reverse('list-create-booking'))
+        response = self.client.get(reverse('list-create-booking'), {'format': 'msgpack'})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        page = decode_bookings(response.content)
+        self.assertEqual(page['count'], 3)
+        # Each room is only sent once
+        self.assertEqual(len(msgpack.unpackb(response.content)['results']['rooms']), 2)
+
+        expected = json_response.json()['results']
+        self.assertEqual(len(page['results']), len(expected))
+        for booking, expected_booking in zip(page['results'], expected):
+            self.assertEqual(str(booking['id']), expected_booking['id'])
+            self.assertEqual(booking['room'], expected_booking['room'])
+            self.assertEqual(booking['booked_by'], expected_booking['booked_by'])
+            self.assertEqual(booking['start_time'], datetime.fromisoformat(expected_booking['start_time'].replace('Z', '+00:00')))
+            self.assertEqual(booking['end_time'], datetime.fromisoformat(expected_booking['end_time'].replace('Z', '+00:00')))
+
+
+class StartupTests(SimpleTestCase):
+    """
+    Test suite for the prebuilt schema and the startup profiler.
+    """
+
+    def reload_urls(self):
+        # The URLs decide at import time how the schema is served.
+        import backend.urls
+        importlib.reload(backend.urls)
+        clear_url_caches()
+
+
+    def test_schema_served_from_file(self):
+        """
+        Ensure the schema named by API_SCHEMA_FILE is served as a cacheable file.
+        """
+        schema_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(schema_dir.cleanup)
+        schema_file = Path(schema_dir.name) / 'openapi.json'
+        schema_file.write_text('{"openapi": "3.0.3"}')
+
+        # Put the normal URLs back afterwards
+        self.addCleanup(self.reload_urls)
+        with self.settings(API_SCHEMA_FILE=str(schema_file)):
+            self.reload_urls()
+            response = self.client.get(reverse('schema'))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Cache-Control'], 'public, max-age=3600')
+        self.assertEqual(b''.join(response.streaming_content), b'{"openapi": "3.0.3"}')
+
+
+    def test_parse_importtime(self):
+        """
+        Ensure `-X importtime` output is parsed into per-module timings.
+        """
+        output = (
+            "import time: self [us] | cumulative | imported package\n"
+            "import time:       360 |        360 |   _io\n"
+            "import time:      2604 |      82008 |     django.db.models.expressions\n"
+            "Some other line on stderr\n"
+            "import time:       261 |     229304 | django.urls\n"
+        )
+
+        self.assertEqual(ProfileStartupCommand.parse_importtime(output), [
+            ('_io', 360, 360),
+            ('django.db.models.expressions', 2604, 82008),
+            ('django.urls', 261, 229304),
+        ])
@@ -1,8 +1,15 @@
 from django.urls import path
-from .views import AvailableRoomsView, BookingListCreateView, BookingCancelView
+from .views import (
+    AvailableRoomsView, BookingListCreateView, BookingCancelView, BookingBulkCancelView, RoomUtilizationView,
+    BookingHoldCreateView, BookingHoldConfirmView,
+)
 
 urlpatterns = [
     path('rooms/available/', AvailableRoomsView.as_view(), name='available-rooms'),
+    path('rooms/utilization/', RoomUtilizationView.as_view(), name='room-utilization'),
     path('bookings/', BookingListCreateView.as_view(), name='list-create-booking'),
+    path('holds/', BookingHoldCreateView.as_view(), name='create-hold'),
+    path('holds/<uuid:hold_id>/confirm/', BookingHoldConfirmView.as_view(), name='confirm-hold'),
+    path('cancel/bulk/', BookingBulkCancelView.as_view(), name='bulk-cancel-booking'),
     path('cancel/<uuid:booking_id>/', BookingCancelView.as_view(), name='cancel-booking'),
 ]
\ No newline at end of file
@@ -1,22 +1,102 @@
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
-from .models import Room, Booking
+from .models import Room, Booking, BookingHold, RoomHourlyUsage
 from .serializers import RoomSerializer
-from django.db.models import Q
-from datetime import datetime
-from django.contrib.auth.models import User
-from django.db import transaction
+from django.db.models import Q, Count, Sum
+from django.db.models.functions import Trunc
+from datetime import datetime, timedelta
+from django.db import IntegrityError, transaction
+from django.conf import settings
+from django.utils import timezone
 from .models import Team, RoomType
-from .serializers import BookingCreateSerializer, BookingSerializer
+from .serializers import BookingCreateSerializer, BookingSerializer, BookingBulkCancelSerializer, UtilizationQuerySerializer, BookingHoldSerializer
 from rest_framework.pagination import PageNumberPagination
-from drf_spectacular.utils import extend_schema, OpenApiParameter
-from drf_spectacular.types import OpenApiTypes
+from rest_framework.settings import api_settings
+from .schema import extend_schema, OpenApiParameter, OpenApiTypes
+from .routers import database_for_site
+from .sites import get_site
+from .authentication import get_team_ids
+from .renderers import MessagePackRenderer
+from .compact import compact_rooms, compact_bookings
 
-class AvailableRoomsView(APIView):
+class SiteScopedMixin:
+    """
+    Resolves the optional `site_slug` URL argument to a Site.
+    Endpoints that are not scoped to a site use the default site.
+    """
+    def get_site(self, site_slug):
+        # Served from the in-process site cache, usually without a query.
+        return get_site(site_slug or settings.DEFAULT_SITE)
+
+    def site_not_found(self):
+        return Response({"error": "Site not found."}, status=status.HTTP_404_NOT_FOUND)
+
+    def not_a_team_member(self):
+        return Response({"error": "You are not a member of this team."}, status=status.HTTP_403_FORBIDDEN)
+
+class RoomAllocationMixin:
+    """
+    Picks a free room for a booking or a hold.
+    """
+    def allocate_room(self, db, site, start_time, end_time, booking_type, team_id):
+        """
+        Finds a room that is neither booked nor held during the slot.
+        Must run inside a transaction on `db`.
+        Returns a (room, error_response) pair; exactly one of them is set.
+        """
+        if booking_type == 'individual':
+            # Priority: Private -> Shared
+            room_types = [RoomType.PRIVATE, RoomType.SHARED]
+
+        elif booking_type == 'team':
+            team = Team.objects.get(id=team_id)
+            if team.members.count() < 3:
+                return None, Response({"error": "Teams must have at least 3 members to book a conference room."}, status=status.HTTP_400_BAD_REQUEST)
+
+            room_types = [RoomType.CONFERENCE]
+
+        candidate_rooms = Room.objects.using(db).filter(site=site, room_type__in=room_types)
+
+        # Lock the candidate rooms first. Two requests for the same slot would
+        # otherwise both see the room as free, because neither can lock the
+        # other's new booking or hold. Locking in id order avoids deadlocks.
+        list(candidate_rooms.order_by('id').select_for_update().values_list('id', flat=True))
+
+        # Find rooms that are already booked during the requested time.
+        overlapping_bookings = Booking.objects.using(db).filter(
+            site=site, start_time__lt=end_time, end_time__gt=start_time
+        )
+
+        # Rooms someone is holding while they confirm are taken too.
+        overlapping_holds = BookingHold.objects.using(db).active().filter(
+            site=site, start_time__lt=end_time, end_time__gt=start_time
+        )
+
+        booked_room_ids = overlapping_bookings.values_list('room_id', flat=True)
+        held_room_ids = overlapping_holds.values_list('room_id', flat=True)
+
+        available_rooms = candidate_rooms.exclude(id__in=booked_room_ids).exclude(id__in=held_room_ids)
+
+        target_room = None
+        for room_type in room_types:
+            # Logic for shared desks will be more complex, for now we find one
+            target_room = available_rooms.filter(room_type=room_type).first()
+            if target_room:
+                break
+
+        if not target_room:
+            return None, Response({"error": "No available rooms for the selected criteria and time slot."}, status=status.HTTP_404_NOT_FOUND)
+
+        return target_room, None
+
+class AvailableRoomsView(SiteScopedMixin, APIView):
     """
     API view to get available rooms for a given time slot.
     """
+    # High-volume clients can ask for compact MessagePack instead of JSON.
+    renderer_classes = api_settings.DEFAULT_RENDERER_CLASSES + [MessagePackRenderer]
+
     @extend_schema(
         parameters=[
             OpenApiParameter(name='start_time', type=OpenApiTypes.DATETIME, required=True, description='Start of the desired slot (ISO 8601 format with Z)'),
@@ -24,7 +104,13 @@ class AvailableRoomsView(APIView):
         ],
         description="Fetches rooms that are available for the entire duration of the requested time slot."
     )
-    def get(self, request, *args, **kwargs):
+    def get(self, request, site_slug=None, *args, **kwargs):
+        site = self.get_site(site_slug)
+        if site is None:
+            return self.site_not_found()
+        # The site's rooms and bookings may live in their own database.
+        db = database_for_site(site)
+
         start_time_str = request.query_params.get('start_time')
         end_time_str = request.query_params.get('end_time')
 
@@ -49,24 +135,33 @@ class AvailableRoomsView(APIView):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        overlapping_bookings = Booking.objects.filter(
-            Q(start_time__lt=end_time) & Q(end_time__gt=start_time)
+        overlapping_bookings = Booking.objects.using(db).filter(
+            Q(site=site) & Q(start_time__lt=end_time) & Q(end_time__gt=start_time)
+        )
+        overlapping_holds = BookingHold.objects.using(db).active().filter(
+            Q(site=site) & Q(start_time__lt=end_time) & Q(end_time__gt=start_time)
         )
 
         booked_room_ids = overlapping_bookings.values_list('room_id', flat=True)
+        # Rooms that are held by someone else count as booked.
+        held_room_ids = overlapping_holds.values_list('room_id', flat=True)
 
         # Only exclude rooms if there are actually any bookings in the given slot.
         # Otherwise, the `NOT IN ()` SQL query will return an empty list.
+        # If no rooms are booked, all rooms are available.
+        available_rooms = Room.objects.using(db).filter(site=site)
         if booked_room_ids.exists():
-            available_rooms = Room.objects.exclude(id__in=booked_room_ids)
-        else:
-            # If no rooms are booked, all rooms are available.
-            available_rooms = Room.objects.all()
+            available_rooms = available_rooms.exclude(id__in=booked_room_ids)
+        if held_room_ids.exists():
+            available_rooms = available_rooms.exclude(id__in=held_room_ids)
+
+        if request.accepted_renderer.format == MessagePackRenderer.format:
+            return Response(compact_rooms(available_rooms), status=status.HTTP_200_OK)
 
         serializer = RoomSerializer(available_rooms, many=True)
         return Response(serializer.data, status=status.HTTP_200_OK)
 
-class BookingListCreateView(APIView):
+class BookingListCreateView(SiteScopedMixin, RoomAllocationMixin, APIView):
     """
     API view for listing and creating bookings.
     GET: Returns a paginated list of all bookings.
@@ -80,11 +175,24 @@ class BookingListCreateView(APIView):
 
     pagination_class = StandardResultsSetPagination
 
-    def get(self, request, *args, **kwargs):
-        bookings = Booking.objects.select_related('room', 'booked_by').all()
+    # High-volume clients can ask for compact MessagePack instead of JSON.
+    renderer_classes = api_settings.DEFAULT_RENDERER_CLASSES + [MessagePackRenderer]
+
+    def get(self, request, site_slug=None, *args, **kwargs):
+        site = self.get_site(site_slug)
+        if site is None:
+            return self.site_not_found()
+
+        # Users live in the default database, so they can't be joined to
+        # bookings kept in a shard; fetch them in one extra query instead.
+        bookings = Booking.objects.using(database_for_site(site)).filter(site=site).select_related('room').prefetch_related('booked_by')
         
         paginator = self.pagination_class()
         paginated_bookings = paginator.paginate_queryset(bookings, request, view=self)
+
+        if request.accepted_renderer.format == MessagePackRenderer.format:
+            # Rooms are sent once and referenced by id, see `bookings.compact`.
+            return paginator.get_paginated_response(compact_bookings(paginated_bookings))
         
         # We reuse the BookingSerializer we created earlier
         serializer = BookingSerializer(paginated_bookings, many=True)
@@ -96,10 +204,14 @@ class BookingListCreateView(APIView):
         responses={201: BookingSerializer},
         description="Creates a booking by finding an available room based on the specified type and time slot."
     )
-    def post(self, request, *args, **kwargs):
-        # For this test, we'll get or create a dummy user.
-        # In a real app, this would be `request.user` from an authentication system.
-        user, _ = User.objects.get_or_create(username='testuser')
+    def post(self, request, site_slug=None, *args, **kwargs):
+        site = self.get_site(site_slug)
+        if site is None:
+            return self.site_not_found()
+        db = database_for_site(site)
+
+        # The authenticated user, resolved from the (cached) token without a query.
+        user = request.user
 
         serializer = BookingCreateSerializer(data=request.data)
         if not serializer.is_valid():
@@ -111,45 +223,30 @@ class BookingListCreateView(APIView):
         booking_type = validated_data['booking_type']
         team_id = validated_data.get('team_id')
 
+        # Only members can book for a team (checked against the cached principal).
+        if team_id and team_id not in get_team_ids(user):
+            return self.not_a_team_member()
+
         try:
             # Use a transaction to prevent race conditions.
-            with transaction.atomic():
-                # Find rooms that are already booked during the requested time.
-                overlapping_bookings = Booking.objects.filter(
-                    start_time__lt=end_time, end_time__gt=start_time
-                ).select_for_update() # Lock these rows until the transaction is complete.
-
-                booked_room_ids = overlapping_bookings.values_list('room_id', flat=True)
-
-                available_rooms = Room.objects.exclude(id__in=booked_room_ids)
-                
-                target_room = None
-
-                if booking_type == 'individual':
-                    # Priority: Private -> Shared
-                    target_room = available_rooms.filter(room_type=RoomType.PRIVATE).first()
-                    if not target_room:
-                        # Logic for shared desks will be more complex, for now we find one
-                        target_room = available_rooms.filter(room_type=RoomType.SHARED).first()
-
-                elif booking_type == 'team':
-                    team = Team.objects.get(id=team_id)
-                    if team.members.count() < 3:
-                        return Response({"error": "Teams must have at least 3 members to book a conference room."}, status=status.HTTP_400_BAD_REQUEST)
-                    
-                    target_room = available_rooms.filter(room_type=RoomType.CONFERENCE).first()
-
-                if not target_room:
-                    return Response({"error": "No available rooms for the selected criteria and time slot."}, status=status.HTTP_404_NOT_FOUND)
+            # Only this site's database is locked, other sites are never touched.
+            with transaction.atomic(using=db):
+                target_room, error_response = self.allocate_room(db, site, start_time, end_time, booking_type, team_id)
+                if error_response:
+                    return error_response
 
                 # Create the booking
-                booking = Booking.objects.create(
+                booking = Booking.objects.using(db).create(
                     room=target_room,
+                    site=site,
                     booked_by=user,
                     team=Team.objects.get(id=team_id) if team_id else None,
                     start_time=start_time,
                     end_time=end_time
                 )
+
+                # Keep the utilization rollup up to date
+                RoomHourlyUsage.objects.using(db).add_bookings([(site.id, target_room.id, start_time, end_time)])
                 
                 # Use the original BookingSerializer to format the successful response
                 response_serializer = BookingSerializer(booking)
@@ -159,22 +256,254 @@ class BookingListCreateView(APIView):
             # A generic error handler in case something unexpected happens
             return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
-class BookingCancelView(APIView):
+class BookingCancelView(SiteScopedMixin, APIView):
     """
     API view for cancelling (deleting) a booking.
     """
-    def post(self, request, booking_id, *args, **kwargs):
-        # The booking_id comes from the URL.
-        try:
-            # Find the booking with the given UUID.
-            booking = Booking.objects.get(id=booking_id)
-        except Booking.DoesNotExist:
-            # If no booking is found, return a 404 Not Found error.
-            return Response({"error": "Booking not found."}, status=status.HTTP_404_NOT_FOUND)
+    def post(self, request, booking_id, site_slug=None, *args, **kwargs):
+        site = self.get_site(site_slug)
+        if site is None:
+            return self.site_not_found()
+
+        db = database_for_site(site)
+        # Callers may only cancel their own bookings or their teams' bookings
+        allowed = Q(booked_by_id=request.user.id) | Q(team_id__in=get_team_ids(request.user))
+
+        with transaction.atomic(using=db):
+            # The booking_id comes from the URL.
+            # Delete it in a single query; RETURNING tells us whether it existed.
+            # Someone else's booking is reported as not found rather than leaking its existence.
+            deleted = Booking.objects.using(db).filter(allowed, site=site, id=booking_id).delete_returning(
+                'id', 'site', 'room', 'start_time', 'end_time'
+            )
+            # Take its minutes out of the utilization rollup
+            RoomHourlyUsage.objects.using(db).add_bookings([row[1:] for row in deleted], sign=-1)
 
-        # If the booking is found, delete it from the database.
-        booking.delete()
+        if not deleted:
+            # If no booking was found, return a 404 Not Found error.
+            return Response({"error": "Booking not found."}, status=status.HTTP_404_NOT_FOUND)
 
         # Return a 204 No Content response, which is the standard
         # for a successful deletion with no body.
         return Response(status=status.HTTP_204_NO_CONTENT)
+
+class BookingBulkCancelView(SiteScopedMixin, APIView):
+    """
+    API view for cancelling many bookings in one request.
+    """
+    @extend_schema(
+        request=BookingBulkCancelSerializer,
+        responses={200: OpenApiTypes.OBJECT},
+        description="Cancels bookings by a list of ids, or by team with an optional time range. All matching bookings are deleted in a single statement."
+    )
+    def post(self, request, site_slug=None, *args, **kwargs):
+        site = self.get_site(site_slug)
+        if site is None:
+            return self.site_not_found()
+
+        serializer = BookingBulkCancelSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        validated_data = serializer.validated_data
+        db = database_for_site(site)
+        bookings = Booking.objects.using(db).filter(site=site)
+
+        # Callers may only cancel bookings they made or that belong to one of
+        # their teams (checked against the cached principal).
+        team_ids = get_team_ids(request.user)
+        if validated_data.get('team_id') and validated_data['team_id'] not in team_ids:
+            return self.not_a_team_member()
+        allowed = Q(booked_by_id=request.user.id) | Q(team_id__in=team_ids)
+
+        if validated_data.get('booking_ids'):
+            bookings = bookings.filter(id__in=validated_data['booking_ids'])
+        if validated_data.get('team_id'):
+            bookings = bookings.filter(team_id=validated_data['team_id'])
+        # Only cancel bookings that lie entirely inside the given range.
+        if validated_data.get('start_time'):
+            bookings = bookings.filter(start_time__gte=validated_data['start_time'])
+        if validated_data.get('end_time'):
+            bookings = bookings.filter(end_time__lte=validated_data['end_time'])
+
+        with transaction.atomic(using=db):
+            if validated_data.get('booking_ids') and bookings.exclude(allowed).exists():
+                return Response({"error": "You can only cancel your own or your teams' bookings."}, status=status.HTTP_403_FORBIDDEN)
+
+            deleted = bookings.filter(allowed).delete_returning('id', 'site', 'room', 'start_time', 'end_time')
+            # Take their minutes out of the utilization rollup
+            RoomHourlyUsage.objects.using(db).add_bookings([row[1:] for row in deleted], sign=-1)
+
+        cancelled_ids = [row[0] for row in deleted]
+
+        return Response({"cancelled": cancelled_ids, "count": len(cancelled_ids)}, status=status.HTTP_200_OK)
+
+class RoomUtilizationView(SiteScopedMixin, APIView):
+    """
+    API view reporting how much of the time rooms were booked.
+    """
+    # Minutes in one period of each granularity
+    PERIOD_MINUTES = {'hour': 60, 'day': 24 * 60, 'week': 7 * 24 * 60}
+
+    @extend_schema(
+        parameters=[UtilizationQuerySerializer],
+        responses={200: OpenApiTypes.OBJECT},
+        description="Reports booked minutes and utilization per room or room type, per hour, day or week. Reads the hourly rollup instead of the bookings."
+    )
+    def get(self, request, site_slug=None, *args, **kwargs):
+        site = self.get_site(site_slug)
+        if site is None:
+            return self.site_not_found()
+        db = database_for_site(site)
+
+        serializer = UtilizationQuerySerializer(data=request.query_params)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        validated_data = serializer.validated_data
+        granularity = validated_data['granularity']
+        group_key = 'room_id' if validated_data['group_by'] == 'room' else 'room__room_type'
+
+        usage = RoomHourlyUsage.objects.using(db).filter(
+            site=site,
+            hour__gte=validated_data['start_time'].replace(minute=0, second=0, microsecond=0),
+            hour__lt=validated_data['end_time'],
+        )
+        rows = (
+            usage.annotate(period=Trunc('hour', granularity))
+            .values('period', group_key)
+            .annotate(booked_minutes=Sum('booked_minutes'))
+            .order_by('period', group_key)
+        )
+
+        # How many rooms share each group, to turn minutes into a utilization ratio.
+        if group_key == 'room_id':
+            rooms_per_group = {}
+        else:
+            rooms_per_group = dict(
+                Room.objects.using(db).filter(site=site).values_list('room_type').annotate(Count('id'))
+            )
+        period_minutes = self.PERIOD_MINUTES[granularity]
+
+        report = [
+            {
+                'period': row['period'],
+                validated_data['group_by']: row[group_key],
+                'booked_minutes': row['booked_minutes'],
+                'utilization': round(row['booked_minutes'] / (period_minutes * rooms_per_group.get(row[group_key], 1)), 4),
+            }
+            for row in rows
+        ]
+        return Response(report, status=status.HTTP_200_OK)
+
+class BookingHoldCreateView(SiteScopedMixin, RoomAllocationMixin, APIView):
+    """
+    API view for placing a short-lived hold on a room, the first step of
+    a two-phase booking. The hold is confirmed with BookingHoldConfirmView.
+    """
+    @extend_schema(
+        request=BookingCreateSerializer,
+        responses={201: BookingHoldSerializer},
+        description="Holds an available room for the time slot for a few minutes (BOOKING_HOLD_TTL). Nobody else can book the room for that slot until the hold is confirmed or expires."
+    )
+    def post(self, request, site_slug=None, *args, **kwargs):
+        site = self.get_site(site_slug)
+        if site is None:
+            return self.site_not_found()
+        db = database_for_site(site)
+
+        serializer = BookingCreateSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        validated_data = serializer.validated_data
+        start_time = validated_data['start_time']
+        end_time = validated_data['end_time']
+        team_id = validated_data.get('team_id')
+
+        # Only members can hold a room for a team (checked against the cached principal).
+        if team_id and team_id not in get_team_ids(request.user):
+            return self.not_a_team_member()
+
+        try:
+            with transaction.atomic(using=db):
+                target_room, error_response = self.allocate_room(db, site, start_time, end_time, validated_data['booking_type'], team_id)
+                if error_response:
+                    return error_response
+
+                hold = BookingHold.objects.using(db).create(
+                    room=target_room,
+                    site=site,
+                    held_by=request.user,
+                    team_id=team_id,
+                    start_time=start_time,
+                    end_time=end_time,
+                    expires_at=timezone.now() + timedelta(seconds=settings.BOOKING_HOLD_TTL)
+                )
+
+                response_serializer = BookingHoldSerializer(hold)
+                return Response(response_serializer.data, status=status.HTTP_201_CREATED)
+
+        except Exception as e:
+            # A generic error handler in case something unexpected happens
+            return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+class BookingHoldConfirmView(SiteScopedMixin, APIView):
+    """
+    API view for confirming a hold into a booking.
+    """
+    @extend_schema(
+        request=None,
+        responses={201: BookingSerializer},
+        description="Turns an active hold into a booking. Returns 409 if the room was booked in the meantime."
+    )
+    def room_taken(self):
+        return Response({"error": "The room has already been booked for this time slot."}, status=status.HTTP_409_CONFLICT)
+
+    def post(self, request, hold_id, site_slug=None, *args, **kwargs):
+        site = self.get_site(site_slug)
+        if site is None:
+            return self.site_not_found()
+        db = database_for_site(site)
+
+        try:
+            with transaction.atomic(using=db):
+                # Take the hold in a single query. Only its owner can confirm it,
+                # and only while it is active.
+                taken = BookingHold.objects.using(db).active().filter(
+                    site=site, id=hold_id, held_by=request.user
+                ).delete_returning('room', 'team', 'start_time', 'end_time')
+
+                if not taken:
+                    return Response({"error": "Hold not found or expired."}, status=status.HTTP_404_NOT_FOUND)
+
+                room_id, team_id, start_time, end_time = taken[0]
+
+                # Lock the room like allocate_room does, then make sure nobody
+                # booked it in the meantime, e.g. after the hold had expired.
+                list(Room.objects.using(db).filter(id=room_id).select_for_update().values_list('id', flat=True))
+                if Booking.objects.using(db).filter(
+                    room_id=room_id, start_time__lt=end_time, end_time__gt=start_time
+                ).exists():
+                    # The hold is released; it can never be confirmed.
+                    return self.room_taken()
+
+                booking = Booking.objects.using(db).create(
+                    room_id=room_id,
+                    site=site,
+                    booked_by=request.user,
+                    team_id=team_id,
+                    start_time=start_time,
+                    end_time=end_time
+                )
+
+                # Keep the utilization rollup up to date
+                RoomHourlyUsage.objects.using(db).add_bookings([(site.id, room_id, start_time, end_time)])
+        except IntegrityError:
+            # Safety net: the (room, start_time) unique constraint caught a booking
+            # we couldn't see. The whole transaction is rolled back.
+            return self.room_taken()
+
+        # Use the original BookingSerializer to format the successful response
+        response_serializer = BookingSerializer(booking)
+        return Response(response_serializer.data, status=status.HTTP_201_CREATED)